@@ -0,0 +1,107 @@
+"""Caches that take the database out of the per-request auth path.
+
+- Verified JWT payloads are memoized per token until the token expires, so
+  the HMAC check runs once per token and worker.
+- Authenticated principals (User / Admin rows) are kept in an LRU with a
+  short TTL, keyed by the token's user type and id/username.
+
+Cached principals are detached ORM objects shared between requests: treat
+them as read-only and load a fresh row through the request's session before
+modifying anything. Any session that updates or deletes a user or admin
+drops it from this worker's cache when it flushes and again when it commits
+(so a request racing the commit can't re-cache the old row). Other workers,
+and changes made outside the API (``delete_admin.py``, SQL), are only picked
+up when the entry expires: revocation there is TTL-bound, so keep
+``PRINCIPAL_CACHE_TTL`` short.
+"""
+import os
+import time
+
+from jose import jwt, JWTError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+import models
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+_principals = TTLCache(ttl=PRINCIPAL_CACHE_TTL, maxsize=PRINCIPAL_CACHE_SIZE)
+# Entries get a per-token TTL (time to expiry); the default only applies to tokens without exp
+_tokens = TTLCache(ttl=PRINCIPAL_CACHE_TTL, maxsize=TOKEN_CACHE_SIZE)
+
+
+def decode_token(token, secret_key, algorithm):
+    """``jwt.decode`` with the verified payload memoized until the token expires."""
+    payload = _tokens.get(token)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+    expires_at = payload.get("exp")
+    if expires_at is None:
+        _tokens.set(token, payload)
+    else:
+        remaining = float(expires_at) - time.time()
+        if remaining <= 0:
+            raise JWTError("Signature has expired.")
+        _tokens.set(token, payload, ttl=remaining)
+    return payload
+
+
+def get_user(user_id):
+    return _principals.get(("user", user_id))
+
+
+def set_user(user):
+    _principals.set(("user", user.id), user)
+
+
+def get_admin(username):
+    return _principals.get(("admin", username))
+
+
+def set_admin(admin):
+    _principals.set(("admin", admin.username), admin)
+
+
+def invalidate_user(user_id):
+    _principals.pop(("user", user_id))
+
+
+def invalidate_admin(username):
+    _principals.pop(("admin", username))
+
+
+def _principal_keys(obj):
+    if isinstance(obj, models.User):
+        return {("user", obj.id)}
+    # A renamed admin is cached under its old username
+    usernames = {obj.username, *inspect(obj).attrs.username.history.deleted}
+    return {("admin", username) for username in usernames if username}
+
+
+@event.listens_for(Session, "after_flush")
+def _drop_flushed_principals(session, flush_context):
+    # dirty/deleted (and attribute history) still describe what this flush wrote
+    keys = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (models.User, models.Admin)):
+            keys |= _principal_keys(obj)
+    if keys:
+        for key in keys:
+            _principals.pop(key)
+        session.info.setdefault("stale_principals", set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_committed_principals(session):
+    for key in session.info.pop("stale_principals", ()):
+        _principals.pop(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_principals(session):
+    session.info.pop("stale_principals", None)
@@ -0,0 +1,124 @@
+"""Cold-start time of a replica, checked against a budget.
+
+Times each stage a new container goes through before it can take traffic,
+every stage in a fresh interpreter:
+
+- ``import``: ``import main`` (the cost each worker, or the gunicorn master
+  with ``--preload``, pays before serving),
+- ``schema (new db)``: ``python schema.py`` against an empty database, i.e.
+  the first deploy,
+- ``schema``: ``python schema.py`` against an up-to-date database, which is
+  what every later deploy and every extra replica runs,
+- ``serve``: spawning the server with ``SCHEMA_ON_STARTUP=false`` (as
+  ``railway_start.sh`` does) until ``GET /readyz`` first answers 200.
+
+The budget covers ``schema`` + ``serve``. The script exits non-zero when the
+total is over it. Uses a throwaway SQLite database unless ``DATABASE_URL`` is
+set. Run from the backend directory::
+
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --server gunicorn --workers 4 --budget 10
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env():
+    env = dict(os.environ, SCHEMA_ON_STARTUP="false", LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"))
+    if "DATABASE_URL" not in os.environ and "RAILWAY_DATABASE_URL" not in os.environ:
+        db_dir = tempfile.mkdtemp(prefix="bench-cold-start-")
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    return env
+
+
+def _timed(args, env):
+    started = time.perf_counter()
+    subprocess.run(args, cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_command(server, port, workers):
+    if server == "gunicorn":
+        return [
+            "gunicorn", "-w", str(workers), "-k", "uvicorn.workers.UvicornWorker", "main:app",
+            "--bind", f"127.0.0.1:{port}", "--preload",
+        ]
+    return [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)]
+
+
+def time_to_ready(server, workers, env, timeout):
+    """Seconds from spawning the server until ``/readyz`` answers 200."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/readyz"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        _server_command(server, port, workers), cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{server} exited with status {process.returncode} before it was ready")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"{server} was not ready after {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=("uvicorn", "gunicorn"), default="uvicorn")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the median is kept")
+    parser.add_argument("--budget", type=float, default=10.0, help="seconds allowed for schema + serve")
+    parser.add_argument("--timeout", type=float, default=60.0, help="give up on a server start after this")
+    args = parser.parse_args()
+
+    env = _env()
+    python = sys.executable
+    stages = {"schema (new db)": _timed([python, "schema.py"], env)}
+    runs = {
+        "import": lambda: _timed([python, "-c", "import main"], env),
+        "schema": lambda: _timed([python, "schema.py"], env),
+        "serve": lambda: time_to_ready(args.server, args.workers, env, args.timeout),
+    }
+    for name, run in runs.items():
+        stages[name] = statistics.median(run() for _ in range(args.repeat))
+
+    total = stages["schema"] + stages["serve"]
+    for name, seconds in stages.items():
+        print(f"{name:>16} {seconds:>7.2f}s")
+    print(f"{'cold start':>16} {total:>7.2f}s (budget {args.budget:.1f}s, {args.server})")
+    if total > args.budget:
+        print("Over budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Latency percentiles and throughput of the main API endpoints under load.
+
+Seeds a synthetic, reproducible dataset (``--seed``, see ``seed_data.py``) and drives the real
+ASGI app in-process through ``httpx.ASGITransport``, with ``--concurrency``
+requests in flight. Each scenario is run on its own and reported as
+p50/p95/p99 latency and requests per second:
+
+- ``list``: ``GET /events/`` and ``GET /opportunities/``, walking
+  ``--list-pages`` keyset pages by following ``X-Next-Cursor``,
+- ``search``: ``/events/search/`` and ``/opportunities/search/`` by keyword,
+- ``detail``: ``GET /events/{id}`` and ``GET /opportunities/{id}``,
+- ``like``: ``POST /events/{id}/like``,
+- ``login``: ``POST /token`` (bcrypt-bound; runs ``--login-requests``),
+- ``stats``: ``/events/stats/`` and ``/opportunities/stats/``.
+
+Uses a throwaway SQLite database unless ``--database-url`` is given. An
+existing database is only seeded when it has no events, and the likes
+scenario writes to it. ``--output`` writes the results as JSON (with the
+git commit), and ``--compare`` prints the change against an earlier
+result. Run from the backend directory::
+
+    python benchmarks/load.py --events 5000 --concurrency 20 --output before.json
+    python benchmarks/load.py --events 5000 --concurrency 20 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+USER_PASSWORD = "benchmark-password"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="database to seed and use (default: throwaway SQLite)")
+    parser.add_argument("--events", type=int, default=2000, help="events to seed")
+    parser.add_argument("--opportunities", type=int, default=1000, help="opportunities to seed")
+    parser.add_argument("--users", type=int, default=200, help="users to seed (the first one logs in)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the dataset and the requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--list-pages", type=int, default=5, help="pages each list walk follows")
+    parser.add_argument("--login-requests", type=int, default=50, help="requests for the login scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    _db_dir = tempfile.mkdtemp(prefix="bench-load-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+os.environ.pop("RAILWAY_DATABASE_URL", None)
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ.setdefault("PROFILE_DIR", tempfile.mkdtemp(prefix="bench-load-profiles-"))
+# The schema step runs once below, not on app startup
+os.environ["SCHEMA_ON_STARTUP"] = "false"
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from database import engine  # noqa: E402
+import main  # noqa: E402
+import models  # noqa: E402
+import schema  # noqa: E402
+import seed_data  # noqa: E402
+
+
+def seed():
+    """Seed the dataset (see seed_data.py) unless the database already has events."""
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(models.TechEvent)).scalar():
+            return False
+    seed_data.seed(
+        engine,
+        events=args.events,
+        opportunities=args.opportunities,
+        users=args.users,
+        password=USER_PASSWORD,
+        seed=args.seed,
+    )
+    return True
+
+
+def _login_username():
+    with engine.connect() as conn:
+        return conn.execute(select(models.User.username).order_by(models.User.id).limit(1)).scalar()
+
+
+def _ids(model):
+    with engine.connect() as conn:
+        return conn.execute(select(model.id)).scalars().all()
+
+
+def scenarios(event_ids, opportunity_ids, username):
+    """name -> function(rng) returning (method, url, request kwargs, pages to follow)."""
+    def pick(rng, ids):
+        return rng.choice(ids)
+
+    return {
+        "list": lambda rng: ("GET", rng.choice(("/events/?limit=20", "/opportunities/?limit=20")), {}, args.list_pages),
+        "search": lambda rng: ("GET", rng.choice((
+            f"/events/search/?query={rng.choice(seed_data.WORDS)}&limit=20",
+            f"/opportunities/search/?query={rng.choice(seed_data.WORDS)}&limit=20",
+        )), {}, 1),
+        "detail": lambda rng: ("GET", rng.choice((
+            f"/events/{pick(rng, event_ids)}",
+            f"/opportunities/{pick(rng, opportunity_ids)}",
+        )), {}, 1),
+        "like": lambda rng: ("POST", f"/events/{pick(rng, event_ids)}/like", {}, 1),
+        "login": lambda rng: ("POST", "/token", {"data": {"username": username, "password": USER_PASSWORD}}, 1),
+        "stats": lambda rng: ("GET", rng.choice(("/events/stats/", "/opportunities/stats/")), {}, 1),
+    }
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, make_request, rng, total, concurrency):
+    # Enough walks for ``total`` requests; a walk can end early on the last page
+    requests = []
+    planned = 0
+    while planned < total:
+        requests.append(make_request(rng))
+        planned += requests[-1][3]
+    latencies = []
+    errors = 0
+    position = 0
+
+    async def worker():
+        nonlocal errors, position
+        while position < len(requests):
+            method, url, kwargs, pages = requests[position]
+            position += 1
+            page_url = url
+            for _ in range(pages):
+                started = time.perf_counter()
+                response = await client.request(method, page_url, **kwargs)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+                    break
+                # Keyset pagination: the next page's cursor comes back in a header
+                cursor = response.headers.get("x-next-cursor")
+                if not cursor:
+                    break
+                page_url = f"{url}&cursor={quote(cursor)}"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(selected):
+    schema.ensure_schema(engine)
+    seeded = seed()
+    event_ids = _ids(models.TechEvent)
+    opportunity_ids = _ids(models.ResearchOpportunity)
+    available = scenarios(event_ids, opportunity_ids, _login_username())
+
+    results = {}
+    await main.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in selected:
+                total = args.login_requests if name == "login" else args.requests
+                scenario_rng = random.Random(f"{args.seed}-{name}")
+                if args.warmup:
+                    await run_scenario(client, available[name], scenario_rng, min(args.warmup, total), args.concurrency)
+                results[name] = await run_scenario(client, available[name], scenario_rng, total, args.concurrency)
+    finally:
+        await main.app.router.shutdown()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "database": engine.dialect.name,
+            "seeded": seeded,
+            "events": len(event_ids),
+            "opportunities": len(opportunity_ids),
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+
+
+def _change(new, old):
+    if not old:
+        return ""
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def report(data, baseline=None):
+    meta = data["meta"]
+    print(
+        f"{meta['database']}, {meta['events']} events / {meta['opportunities']} opportunities, "
+        f"concurrency {meta['concurrency']}, commit {meta['commit'] or '?'}"
+    )
+    columns = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+    print(f"{'scenario':>10} " + " ".join(f"{column:>15}" for column in columns) + f" {'errors':>7}")
+    for name, result in data["results"].items():
+        previous = (baseline or {}).get("results", {}).get(name, {})
+        cells = []
+        for column in columns:
+            cell = f"{result[column]:,.1f}"
+            if column in previous:
+                cell += f" {_change(result[column], previous[column]):>5}"
+            cells.append(f"{cell:>15}")
+        print(f"{name:>10} " + " ".join(cells) + f" {result['errors']:>7}")
+
+
+def main_():
+    available = ("list", "search", "detail", "like", "login", "stats")
+    selected = args.scenario or list(available)
+    unknown = set(selected) - set(available)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}. Choose from: {', '.join(available)}")
+
+    data = asyncio.run(run(selected))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(data, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_()
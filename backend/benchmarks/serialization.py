@@ -0,0 +1,149 @@
+"""Rows/sec of the list serialization paths: ORM + response_model vs fast_json.
+
+Seeds a throwaway SQLite database with events, then times fetching and
+encoding one page at a time through
+
+- ``orm``: ``select(TechEvent)`` ORM objects validated and serialized by
+  FastAPI's ``response_model`` machinery for ``schemas.TechEvent``, then
+  rendered like ``JSONResponse``. This is what the endpoints did before
+  ``fast_json`` and what they fall back to with ``FAST_JSON_RESPONSES=false``,
+- ``fast``: the same fields as column tuples through ``fast_json`` as
+  deployed (pydantic-core validation and encoding), and
+- ``list``: what ``GET /events/`` sends by default, i.e. ``fast`` without
+  the ``description`` column (``summary`` instead).
+
+Run from the backend directory::
+
+    python benchmarks/serialization.py --rows 20000 --page-size 100 --page-size 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_db_dir = tempfile.mkdtemp(prefix="bench-serialization-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from database import engine, SessionLocal  # noqa: E402
+import models  # noqa: E402
+import schemas  # noqa: E402
+import fast_json  # noqa: E402
+
+
+def seed(rows):
+    models.Base.metadata.create_all(bind=engine)
+    start = datetime(2030, 1, 1)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            batch.append({
+                "title": f"Event {i}",
+                "organization": "Benchmark Org",
+                "description": "A reasonably sized description of the event. " * 8,
+                "venue": "Main hall",
+                "registration_link": f"https://example.com/events/{i}",
+                "start_date": start + timedelta(hours=i),
+                "end_date": start + timedelta(hours=i + 2),
+                "location": "Pittsburgh, PA",
+                "type": "Conference",
+                "price": "Free",
+                "tech_stack": ["Python", "FastAPI", "PostgreSQL"],
+                "speakers": ["Ada Lovelace", "Grace Hopper"],
+                "virtual": i % 2 == 0,
+                "tags": ["backend", "web"],
+                "attendees": i,
+                "likes": i % 97,
+            })
+            if len(batch) == 1000:
+                conn.execute(insert(models.TechEvent), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.TechEvent), batch)
+
+
+_all_fields = fast_json.events.with_fields(",".join(schemas.TechEvent.model_fields))
+
+
+def _serializer_page(serializer, session, offset, limit, enabled=True):
+    previous, fast_json.ENABLED = fast_json.ENABLED, enabled
+    try:
+        rows = session.execute(
+            serializer.select().order_by(models.TechEvent.id).offset(offset).limit(limit)
+        ).all()
+        # One-column rows (ORM objects included) are unwrapped, as pagination.page_result does
+        return serializer.dump_list([row[0] if len(row) == 1 else row for row in rows])
+    finally:
+        fast_json.ENABLED = previous
+
+
+def orm_page(session, offset, limit):
+    return _serializer_page(_all_fields, session, offset, limit, enabled=False)
+
+
+def fast_page(session, offset, limit):
+    return _serializer_page(_all_fields, session, offset, limit)
+
+
+def list_page(session, offset, limit):
+    return _serializer_page(fast_json.events, session, offset, limit)
+
+
+PATHS = {"orm": orm_page, "fast": fast_page, "list": list_page}
+
+
+def run(path, total_rows, page_size, repeat):
+    fn = PATHS[path]
+    best = None
+    for _ in range(repeat):
+        session = SessionLocal()
+        try:
+            started = time.perf_counter()
+            for offset in range(0, total_rows, page_size):
+                fn(session, offset, page_size)
+                session.expunge_all()
+            elapsed = time.perf_counter() - started
+        finally:
+            session.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return total_rows / best
+
+
+def check_same_output(page_size):
+    session = SessionLocal()
+    try:
+        assert json.loads(fast_page(session, 0, page_size)) == json.loads(orm_page(session, 0, page_size))
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="rows to seed and serialize per run")
+    parser.add_argument("--page-size", type=int, action="append", help="rows per query (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    args = parser.parse_args()
+    page_sizes = args.page_size or [100, 1000]
+
+    seed(args.rows)
+    check_same_output(min(page_sizes))
+
+    print(f"{'page size':>10} " + " ".join(f"{path + ' rows/s':>13}" for path in PATHS) + f" {'fast/orm':>9}")
+    for page_size in page_sizes:
+        rates = {path: run(path, args.rows, page_size, args.repeat) for path in PATHS}
+        print(
+            f"{page_size:>10} " + " ".join(f"{rate:>13,.0f}" for rate in rates.values())
+            + f" {rates['fast'] / rates['orm']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
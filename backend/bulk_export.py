@@ -0,0 +1,91 @@
+"""Streaming NDJSON / CSV export of events and opportunities.
+
+Rows are read through a server-side cursor (``stream_results`` +
+``yield_per``) and written out one batch at a time, so memory use does not
+grow with the size of the export. The generator opens its own connection
+because request-scoped sessions are closed before a streaming body is sent.
+
+CSV output uses the format :mod:`bulk_import` reads back: list columns are
+``;``-separated (or a JSON array when an item itself contains ``;``).
+"""
+import csv
+import datetime
+import io
+import json
+import os
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, list):
+        if any(";" in str(item) for item in value):
+            return json.dumps(value)
+        return ";".join(str(item) for item in value)
+    return value
+
+
+def _ndjson_batches(keys, partitions):
+    for batch in partitions:
+        yield "".join(
+            json.dumps(dict(zip(keys, row)), default=_json_default) + "\n" for row in batch
+        )
+
+
+def _csv_batches(keys, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(keys)
+    for batch in partitions:
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: nothing matched
+        yield buffer.getvalue()
+
+
+_WRITERS = {"ndjson": _ndjson_batches, "csv": _csv_batches}
+
+
+def export_rows(engine, stmt, export_format, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the encoded output of ``stmt`` one batch of rows at a time."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        yield from _WRITERS[export_format](list(result.keys()), result.partitions())
+
+
+def export_response(engine, stmt, keys, export_format, filename):
+    """StreamingResponse for ``stmt`` ordered by ``keys`` (``(expression, descending)`` pairs)."""
+    if export_format not in _WRITERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(_WRITERS)}",
+        )
+    stmt = stmt.order_by(*(expr.desc() if descending else expr.asc() for expr, descending in keys))
+    return StreamingResponse(
+        export_rows(engine, stmt, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
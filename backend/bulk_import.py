@@ -0,0 +1,252 @@
+"""Bulk import of events and opportunities from NDJSON or CSV uploads.
+
+The request body is consumed chunk by chunk and parsed line by line. Each row
+is validated with the same schema as the single-item create endpoint, and
+valid rows are inserted in ``IMPORT_BATCH_SIZE`` executemany batches, so
+memory stays flat however large the upload is. Invalid rows are skipped and
+reported by line number (the first ``IMPORT_MAX_ERRORS`` of them).
+
+Every batch commits on its own, so an import that is cut off part-way keeps
+the batches before the cut. When the database rejects a batch, its rows are
+retried one at a time to find the offending ones.
+
+CSV uploads need a header row naming the fields. List fields (``tags``,
+``tech_stack``, ...) can be given as a JSON array or separated by ``;``.
+Empty cells fall back to the schema defaults.
+"""
+import codecs
+import csv
+import json
+import logging
+import os
+
+import anyio
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+import models
+import schemas
+import etags
+import summaries
+import tags as tag_index
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+
+
+def _event_values(event):
+    values = event.dict()
+    # Core inserts skip the mapper event that derives the summary
+    values["summary"] = summaries.summarize(values["description"])
+    return values
+
+
+def _opportunity_values(opportunity):
+    values = opportunity.dict()
+    # Same clean-up as the single-item endpoint: drop trailing semicolons
+    if values.get("website"):
+        values["website"] = values["website"].rstrip(";").strip()
+    values["summary"] = summaries.summarize(values["description"])
+    return values
+
+
+# model -> (create schema, list fields, schema instance -> column values)
+IMPORTABLE = {
+    models.TechEvent: (schemas.TechEventCreate, ("tech_stack", "speakers", "tags"), _event_values),
+    models.ResearchOpportunity: (
+        schemas.ResearchOpportunityCreate,
+        ("requirements", "fields", "tags"),
+        _opportunity_values,
+    ),
+}
+
+
+def detect_format(content_type, requested=None):
+    """Pick the upload format from ``?format=`` or else the Content-Type."""
+    if requested:
+        if requested not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}",
+            )
+        return requested
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in _CONTENT_TYPES:
+        return _CONTENT_TYPES[media_type]
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send application/x-ndjson or text/csv, or pass ?format=ndjson|csv",
+    )
+
+
+def blocking_chunks(stream):
+    """Iterate an async byte stream (e.g. ``request.stream()``) from a worker thread."""
+    while True:
+        try:
+            chunk = anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            return
+        if chunk:
+            yield chunk
+
+
+def iter_lines(chunks):
+    """Decode byte chunks into text lines (with their ``\\n``), one line in memory at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _split_list(value):
+    if value.lstrip().startswith("["):
+        return json.loads(value)
+    return [item.strip() for item in value.split(";") if item.strip()]
+
+
+def _ndjson_records(lines, list_fields):
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, [f"Invalid JSON: {e}"]
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, ["Expected a JSON object"]
+            continue
+        yield line_no, record, None
+
+
+def _csv_records(lines, list_fields):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        if None in row:
+            yield reader.line_num, None, ["More values than header columns"]
+            continue
+        record = {}
+        try:
+            for key, value in row.items():
+                if value is None or value == "":
+                    continue
+                record[key] = _split_list(value) if key in list_fields else value
+        except ValueError as e:
+            yield reader.line_num, None, [f"Invalid list value: {e}"]
+            continue
+        yield reader.line_num, record, None
+
+
+_READERS = {"ndjson": _ndjson_records, "csv": _csv_records}
+
+
+def _validation_messages(error):
+    return [
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    ]
+
+
+class _Report:
+    def __init__(self, import_format):
+        self.import_format = import_format
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.aborted = None
+
+    def fail(self, line_no, messages):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line_no, "errors": messages})
+
+    def as_dict(self):
+        return {
+            "format": self.import_format,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+
+def _insert(conn, model, batch):
+    table = model.__table__
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids = conn.execute(stmt, [values for _, values in batch]).scalars().all()
+    # Core inserts bypass the mapper events that normally keep item_tags in sync
+    tag_rows = []
+    for (_, values), item_id in zip(batch, ids):
+        tag_rows.extend(tag_index.rows_for(model, {**values, "id": item_id}))
+    tag_index.write_rows(conn, tag_rows)
+    etags.bump(conn, {table.name})
+
+
+def _flush(engine, model, batch, report):
+    try:
+        with engine.begin() as conn:
+            _insert(conn, model, batch)
+        report.inserted += len(batch)
+        return
+    except SQLAlchemyError as e:
+        logger.warning("Import batch of %d rows rejected, retrying row by row: %s", len(batch), e)
+
+    for line_no, values in batch:
+        try:
+            with engine.begin() as conn:
+                _insert(conn, model, [(line_no, values)])
+            report.inserted += 1
+        except SQLAlchemyError as e:
+            report.fail(line_no, [f"Database error: {e.orig if getattr(e, 'orig', None) else e}"])
+
+
+def import_rows(engine, model, import_format, chunks, batch_size=IMPORT_BATCH_SIZE):
+    """Validate and insert every row of an upload; returns the import report dict.
+
+    Blocking: run it in a worker thread.
+    """
+    schema, list_fields, to_values = IMPORTABLE[model]
+    report = _Report(import_format)
+    batch = []
+    records = _READERS[import_format](iter_lines(chunks), list_fields)
+    try:
+        for line_no, record, problems in records:
+            if problems:
+                report.fail(line_no, problems)
+                continue
+            try:
+                item = schema(**record)
+            except ValidationError as e:
+                report.fail(line_no, _validation_messages(e))
+                continue
+            batch.append((line_no, to_values(item)))
+            if len(batch) >= batch_size:
+                _flush(engine, model, batch, report)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        report.aborted = f"Could not parse the upload: {e}"
+    if batch:
+        _flush(engine, model, batch, report)
+    return report.as_dict()
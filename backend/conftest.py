@@ -0,0 +1,104 @@
+"""Shared pytest fixtures: the app against a throwaway SQLite database.
+
+Run from the backend directory with ``python -m pytest -q``. The database is
+created once per session, so tests give their rows distinctive values
+(search words, tags) rather than relying on an empty table.
+"""
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+_test_dir = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_test_dir, 'test.db')}"
+os.environ.pop("RAILWAY_DATABASE_URL", None)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["PROFILE_DIR"] = os.path.join(_test_dir, "profiles")
+os.environ["CONTINUOUS_PROFILING"] = "false"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+# A manual script that posts to a server on localhost:8080, not a test module
+collect_ignore = ["test_create_opportunity.py"]
+
+ADMIN_PASSWORD = "test-admin-password"
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    username = "test-admin"
+    client.post("/admin/create", json={"username": username, "password": ADMIN_PASSWORD})
+    response = client.post("/token", data={"username": username, "password": ADMIN_PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def db(client):
+    from database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def unique_word():
+    """A token no other test's rows contain (letters only, so FTS keeps it whole)."""
+    return "zq" + "".join(chr(ord("a") + int(c, 16) % 26) for c in uuid.uuid4().hex[:10])
+
+
+@pytest.fixture
+def make_event(db):
+    import models
+
+    def make(**values):
+        start = datetime(2030, 1, 1, 10, 0)
+        event = models.TechEvent(**{
+            "title": "Test event",
+            "organization": "Test org",
+            "description": "A test event.",
+            "venue": "Hall",
+            "registration_link": "https://example.com",
+            "start_date": start,
+            "end_date": start + timedelta(hours=2),
+            "location": "Remote",
+            "type": "Conference",
+            **values,
+        })
+        db.add(event)
+        db.commit()
+        return event
+
+    return make
+
+
+@pytest.fixture
+def make_opportunity(db):
+    import models
+
+    def make(**values):
+        opportunity = models.ResearchOpportunity(**{
+            "title": "Test opportunity",
+            "organization": "Test org",
+            "description": "A test opportunity.",
+            "type": "Research",
+            "location": "Remote",
+            "deadline": datetime(2030, 1, 1),
+            **values,
+        })
+        db.add(opportunity)
+        db.commit()
+        return opportunity
+
+    return make
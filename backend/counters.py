@@ -0,0 +1,211 @@
+"""Write-behind buffer for like / registration / application counters.
+
+Clicks are aggregated in memory per ``(table, column, id)`` and written as
+atomic ``UPDATE ... SET col = col + :delta`` statements, batched with
+executemany. A background thread flushes every ``COUNTER_FLUSH_INTERVAL``
+seconds, or sooner once ``COUNTER_FLUSH_THRESHOLD`` increments are pending, so
+a hot event costs one row update per flush instead of one per click and
+concurrent clicks can't overwrite each other. A click only touches the
+database the first time its counter is seen (to check the row exists and
+read its value); after that the value comes from a per-worker cache that
+every flush refreshes.
+
+Each worker process has its own buffer; the flusher thread is started lazily
+so it lives in the worker that uses it, not in a pre-fork parent.
+"""
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from sqlalchemy import select, update, bindparam
+
+from cache import TTLCache
+from database import engine as default_engine
+import etags
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "1.0"))
+COUNTER_FLUSH_THRESHOLD = int(os.getenv("COUNTER_FLUSH_THRESHOLD", "500"))
+COUNTER_VALUE_TTL = float(os.getenv("COUNTER_VALUE_TTL", "60"))
+COUNTER_VALUE_CACHE_SIZE = int(os.getenv("COUNTER_VALUE_CACHE_SIZE", "10000"))
+
+
+class CounterBuffer:
+    """Aggregates counter increments and flushes them in batches.
+
+    With ``flush_interval <= 0`` every increment is written through
+    immediately (still as an atomic UPDATE).
+    """
+
+    def __init__(self, engine, flush_interval=COUNTER_FLUSH_INTERVAL, flush_threshold=COUNTER_FLUSH_THRESHOLD):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.on_flush = []  # callbacks taking the set of flushed table names
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._pending_total = 0
+        # (table, column, id) -> value in the database, read on the first click
+        # and after every flush; also proves the row exists. Only written under _lock.
+        self._stored = TTLCache(ttl=COUNTER_VALUE_TTL, maxsize=COUNTER_VALUE_CACHE_SIZE)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def increment(self, model, column, item_id, amount=1):
+        """Add ``amount`` to a counter; returns its new value, or None if the row doesn't exist.
+
+        The value is the stored one this worker last read plus the increments
+        it hasn't flushed yet, so clicks handled by other workers show up after
+        its next flush (or within ``COUNTER_VALUE_TTL``). Only the first click
+        on a counter reads the database.
+        """
+        table = model.__table__
+        if self.flush_interval <= 0:
+            return self._write_through(table, column, item_id, amount)
+
+        key = (table, column, item_id)
+        if self._stored.get(key) is None:
+            with self.engine.connect() as conn:
+                stored = conn.execute(select(table.c[column]).where(table.c.id == item_id)).first()
+            if stored is None:
+                return None
+            with self._lock:
+                # A flush may have stored a fresher value meanwhile
+                if self._stored.get(key) is None:
+                    self._stored.set(key, stored[0] or 0)
+
+        with self._lock:
+            self._pending[key] += amount
+            self._pending_total += amount
+            value = self._stored.get(key, 0) + self._pending[key]
+            over_threshold = self._pending_total >= self.flush_threshold
+
+        self._ensure_flusher()
+        if over_threshold:
+            self._wakeup.set()
+        return value
+
+    def _write_through(self, table, column, item_id, amount):
+        with self.engine.begin() as conn:
+            value = conn.execute(
+                update(table)
+                .where(table.c.id == item_id)
+                .values({column: table.c[column] + amount})
+                .returning(table.c[column])
+            ).scalar()
+            if value is None:
+                return None
+            etags.bump(conn, {table.name})
+        self._notify({table.name})
+        return value
+
+    def pending(self, model, column, item_id):
+        """Increments not yet written to the database for one counter."""
+        with self._lock:
+            return self._pending.get((model.__table__, column, item_id), 0)
+
+    def flush(self):
+        """Write all pending deltas, one executemany per (table, column)."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, defaultdict(int)
+                self._pending_total = 0
+                # Count the deltas as stored from now on, so increment() doesn't dip while they're written
+                self._shift_stored(pending, 1)
+
+            batches = defaultdict(list)
+            for (table, column, item_id), delta in pending.items():
+                if delta:
+                    batches[(table, column)].append({"_id": item_id, "_delta": delta})
+
+            try:
+                with self.engine.begin() as conn:
+                    for (table, column), rows in batches.items():
+                        stmt = (
+                            update(table)
+                            .where(table.c.id == bindparam("_id"))
+                            .values({column: table.c[column] + bindparam("_delta")})
+                        )
+                        conn.execute(stmt, rows)
+                    etags.bump(conn, {table.name for table, _ in batches})
+                    stored = self._read_stored(conn, batches)
+            except Exception as e:
+                logger.error(f"Counter flush failed, will retry: {str(e)}")
+                # Put the deltas back so they are retried with the next flush
+                with self._lock:
+                    self._shift_stored(pending, -1)
+                    for key, delta in pending.items():
+                        self._pending[key] += delta
+                        self._pending_total += delta
+                return
+
+            with self._lock:
+                for key in pending:
+                    if key in stored:
+                        self._stored.set(key, stored[key])
+                    else:
+                        # Deleted: the next click reads it again and gets a 404
+                        self._stored.pop(key)
+
+        self._notify({table.name for table, _ in batches})
+
+    def _shift_stored(self, deltas, sign):
+        for key, delta in deltas.items():
+            value = self._stored.get(key)
+            if value is not None:
+                self._stored.set(key, value + sign * delta)
+
+    @staticmethod
+    def _read_stored(conn, batches):
+        """Current values of the flushed counters, picking up other workers' flushes too."""
+        stored = {}
+        for (table, column), rows in batches.items():
+            ids = [row["_id"] for row in rows]
+            result = conn.execute(select(table.c.id, table.c[column]).where(table.c.id.in_(ids)))
+            for item_id, value in result:
+                stored[(table, column, item_id)] = value or 0
+        return stored
+
+    def _notify(self, flushed_tables):
+        for callback in self.on_flush:
+            try:
+                callback(flushed_tables)
+            except Exception as e:
+                logger.error(f"Counter flush callback failed: {str(e)}")
+
+    def _ensure_flusher(self):
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="counter-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stop(self):
+        """Stop the flusher thread and write whatever is still pending."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self._thread = None
+        self.flush()
+
+
+buffer = CounterBuffer(default_engine)
@@ -1,128 +1,134 @@
 import os
 import logging
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from dotenv import load_dotenv
 
+from logging_config import setup_logging
+import db_pool
+
 # Configure logging for better visibility
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Load environment variables - in production, Railway will provide these
 load_dotenv()
 
-# Debug available environment variables related to databases
-logger.info("Database Environment Variables:")
-for key, value in os.environ.items():
-    if "DATABASE" in key or "DB_" in key:
-        # Mask the value for security
-        masked_value = value[:10] + "..." if value and len(value) > 12 else value
-        logger.info(f"  {key}: {masked_value}")
-
-# First check for RAILWAY_DATABASE_URL, then DATABASE_URL, then fallback to SQLite
-if os.getenv("RAILWAY_DATABASE_URL"):
-    logger.info("Using RAILWAY_DATABASE_URL environment variable")
-    DATABASE_URL = os.getenv("RAILWAY_DATABASE_URL")
-elif os.getenv("DATABASE_URL"):
-    logger.info("Using DATABASE_URL environment variable")
-    DATABASE_URL = os.getenv("DATABASE_URL")
-else:
-    logger.warning("No DATABASE_URL found, falling back to SQLite")
-    DATABASE_URL = "sqlite:///app.db"
-
-# Railway uses 'postgres://' but SQLAlchemy requires 'postgresql://'
-if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
-    logger.info("Converting postgres:// to postgresql:// for SQLAlchemy compatibility")
-    DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
-
-# Create a safe version of the URL for logging
-if DATABASE_URL:
-    db_type = DATABASE_URL.split(":")[0]
-    logger.info(f"Database type: {db_type}")
-    
-    # Mask credentials in URL for logging
-    if '@' in DATABASE_URL:
-        masked_url = DATABASE_URL.split('@')[0].split('//')[0] + '//*****@' + DATABASE_URL.split('@')[1]
-    else:
-        masked_url = DATABASE_URL
-    logger.info(f"Using database: {masked_url}")
-else:
-    logger.error("DATABASE_URL is empty or None!")
+def _database_url():
+    # RAILWAY_DATABASE_URL wins over DATABASE_URL; SQLite is the local fallback
+    url = os.getenv("RAILWAY_DATABASE_URL") or os.getenv("DATABASE_URL")
+    if not url:
+        logger.warning("No DATABASE_URL found, falling back to SQLite")
+        return "sqlite:///app.db"
+    # Railway uses 'postgres://' but SQLAlchemy requires 'postgresql://'
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+DATABASE_URL = _database_url()
+logger.info("Using database: %s", make_url(DATABASE_URL).render_as_string(hide_password=True))
 
 DEBUG_SQL = os.getenv("DEBUG_SQL", "False").lower() in ('true', '1', 't')
 
-# Create engine with appropriate parameters based on the database type
-try:
-    if DATABASE_URL.startswith('sqlite'):
-        # SQLite specific configuration
-        logger.info("Configuring SQLite engine")
-        engine = create_engine(
-            DATABASE_URL,
-            connect_args={"check_same_thread": False},
-            echo=DEBUG_SQL
-        )
-        
-        # Add pragma for better SQLite performance
-        @event.listens_for(engine, "connect")
-        def set_sqlite_pragma(dbapi_connection, connection_record):
-            cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA journal_mode=WAL;")
-            cursor.execute("PRAGMA synchronous=NORMAL;")
-            cursor.execute("PRAGMA foreign_keys=ON;")
-            cursor.close()
-            
-    else:
-        # PostgreSQL configuration for Railway
-        logger.info("Configuring PostgreSQL engine")
-        engine = create_engine(
-            DATABASE_URL,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,  # Help detect stale connections
-            pool_recycle=300,    # Recycle connections every 5 minutes
-            echo=DEBUG_SQL
-        )
-        logger.info("Successfully configured PostgreSQL engine")
-    
-    # Test the engine connection immediately - Make sure to use text() function
-    logger.info("Testing database connection...")
-    try:
-        with engine.connect() as conn:
-            # IMPORTANT: Use text() to create a proper SQL expression
-            query_result = conn.execute(text("SELECT 1")).scalar()
-            logger.info(f"Database connection test successful: {query_result}")
-    except Exception as e:
-        logger.error(f"Database connection test failed: {str(e)}")
-        raise
-    
-except exc.SQLAlchemyError as e:
-    logger.error(f"Database connection error: {str(e)}")
-    # Log critical details for debugging but don't crash
-    logger.error(f"DATABASE_URL type: {DATABASE_URL.split(':')[0] if DATABASE_URL else 'None'}")
-    logger.error(f"Engine creation failed")
-    
-    # Create a fallback SQLite engine for development/testing
-    if not DATABASE_URL.startswith('sqlite'):
-        logger.warning("Falling back to SQLite engine as contingency")
-        DATABASE_URL = "sqlite:///app.db"
-        engine = create_engine(
-            DATABASE_URL,
-            connect_args={"check_same_thread": False},
-            echo=DEBUG_SQL
-        )
-    else:
-        # If we're already using SQLite and it failed, re-raise the error
-        raise
+# Pragmas for better SQLite performance, applied to every new connection
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL;")
+    cursor.execute("PRAGMA synchronous=NORMAL;")
+    cursor.execute("PRAGMA foreign_keys=ON;")
+    cursor.close()
+
+# Per-worker share of the database's connections, see db_pool
+POOL_SIZE, MAX_OVERFLOW = db_pool.pool_limits()
+
+# Engines connect lazily: the first checkout opens a connection, so importing
+# this module (and the app) never waits on the database
+if DATABASE_URL.startswith('sqlite'):
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=db_pool.TimedQueuePool,
+        echo=DEBUG_SQL
+    )
+    event.listen(engine, "connect", set_sqlite_pragma)
+else:
+    logger.info("Connection pool per engine: %d + %d overflow", POOL_SIZE, MAX_OVERFLOW)
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=db_pool.TimedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=db_pool.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,  # Help detect stale connections
+        pool_recycle=300,    # Recycle connections every 5 minutes
+        echo=DEBUG_SQL
+    )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite / asyncpg).
+
+    asyncpg doesn't understand libpq's ``sslmode`` query parameter, so it is
+    translated into the ``ssl`` parameter asyncpg does accept.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode:
+            query["ssl"] = sslmode
+        return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+    return url
+
+# Async engine for handlers that must not block the event loop. Set
+# ASYNC_DATABASE_URL to pick a different async driver; the engine only
+# connects on first use.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(DATABASE_URL)
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, poolclass=db_pool.TimedAsyncQueuePool, echo=DEBUG_SQL
+    )
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=db_pool.TimedAsyncQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=db_pool.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=DEBUG_SQL
+    )
+
+def _dispose_pools_after_fork():
+    # A forked worker (gunicorn --preload) must not reuse connections the parent
+    # opened: both processes would talk over the same sockets. close=False
+    # leaves them open for the parent and gives the child fresh, empty pools.
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    db_pool.TimedQueuePool.stats.reset()
+    db_pool.TimedAsyncQueuePool.stats.reset()
+
+os.register_at_fork(after_in_child=_dispose_pools_after_fork)
+
+# expire_on_commit=False keeps loaded attributes usable after the session
+# closes, e.g. the principal returned by the auth dependencies
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 # FastAPI dependency for DB session
 def get_db() -> Generator[Session, None, None]:
     """Dependency for FastAPI to get a database session.
@@ -143,6 +149,22 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
         
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for FastAPI to get an async database session.
+    
+    Use from ``async def`` handlers so queries don't block the event loop.
+    
+    Yields:
+        AsyncSession: The SQLAlchemy async session
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except exc.SQLAlchemyError as e:
+            logger.error(f"Database error during request: {str(e)}")
+            await db.rollback()
+            raise
+
 @contextmanager
 def get_db_context() -> Generator[Session, None, None]:
     """Context manager for getting a database session outside of FastAPI requests.
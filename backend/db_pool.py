@@ -0,0 +1,138 @@
+"""Connection pool sizing and checkout wait stats for each worker process.
+
+Every worker process (``WEB_CONCURRENCY`` under gunicorn) has its own sync
+and async engine, each with its own pool. A pool of 10 + 20 overflow per
+engine would let 4 workers open 240 connections, more than Postgres allows
+by default. Instead, each pool gets a share of ``DB_MAX_CONNECTIONS`` (minus
+``DB_RESERVED_CONNECTIONS`` kept free for migrations and admin sessions),
+split across replicas, workers and engines. Half of the share is kept open
+(``pool_size``) and the rest is overflow. ``DB_POOL_SIZE`` and
+``DB_MAX_OVERFLOW`` override the computed values.
+
+The pools time every checkout (queue wait, plus connecting or pre-pinging
+when that happens), so an undersized pool shows up as wait time rather than
+as mysterious latency. Checkouts slower than ``DB_POOL_WAIT_WARN_MS`` are
+logged, and every checkout is passed to ``CheckoutStats.observers`` (the
+metrics histograms).
+"""
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+APP_REPLICAS = int(os.getenv("APP_REPLICAS", "1"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_WAIT_WARN_MS = float(os.getenv("DB_POOL_WAIT_WARN_MS", "100"))
+
+# One sync and one async engine per worker process
+ENGINES_PER_WORKER = 2
+
+
+def pool_limits():
+    """``(pool_size, max_overflow)`` for one engine in this worker."""
+    processes = max(1, WEB_CONCURRENCY) * max(1, APP_REPLICAS) * ENGINES_PER_WORKER
+    share = max(1, (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) // processes)
+    pool_size = int(os.getenv("DB_POOL_SIZE", max(1, share // 2)))
+    max_overflow = int(os.getenv("DB_MAX_OVERFLOW", max(0, share - pool_size)))
+    return pool_size, max_overflow
+
+
+class CheckoutStats:
+    """Running totals of how long checkouts from one engine's pool took."""
+
+    # Callbacks taking (name, seconds) for every checkout, seconds=None on a timeout
+    observers = []
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.slow = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            slow = seconds * 1000 >= DB_POOL_WAIT_WARN_MS
+            if slow:
+                self.slow += 1
+        for observer in self.observers:
+            observer(self.name, seconds)
+        if slow:
+            logger.warning(
+                "Slow %s pool checkout", self.name,
+                extra={"engine": self.name, "wait_ms": round(seconds * 1000, 1)},
+            )
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        for observer in self.observers:
+            observer(self.name, None)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.slow,
+                "timeouts": self.timeouts,
+                "total_wait_ms": round(self.total_wait * 1000, 3),
+                "avg_wait_ms": round(self.total_wait * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _TimedCheckout:
+    # A class attribute, so the stats survive Pool.recreate() on dispose
+    stats = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    stats = CheckoutStats("sync")
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = CheckoutStats("async")
+
+
+def pool_status(engine):
+    """Occupancy of ``engine``'s pool plus its checkout stats."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, _TimedCheckout):
+        status.update(pool.stats.snapshot())
+    return status
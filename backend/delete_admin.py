@@ -18,6 +18,9 @@ def delete_admin():
         db.query(models.Admin).filter(models.Admin.username == "lkamanboina").delete()
         db.commit()
         print("Admin user deleted successfully!")
+        # Running API workers cache admins in memory (see auth_cache.py)
+        print(f"Running API workers may accept its tokens for up to PRINCIPAL_CACHE_TTL "
+              f"({os.getenv('PRINCIPAL_CACHE_TTL', '60')}s) longer.")
     except Exception as e:
         print(f"Error: {e}")
         db.rollback()
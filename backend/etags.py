@@ -0,0 +1,148 @@
+"""ETag / Last-Modified support for the catalogue endpoints.
+
+Every write to a versioned table bumps its row in ``table_versions`` inside
+the same transaction: ORM writes through a session ``after_flush`` hook,
+core writes (e.g. counter flushes) by calling :func:`bump` themselves.
+Conditional GETs then cost one primary-key lookup on a tiny table and
+answer 304 before any ORM query or Pydantic validation runs.
+"""
+import datetime
+import logging
+from email.utils import format_datetime, parsedate_to_datetime
+
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from database import engine as default_engine, async_engine as default_async_engine
+import models
+
+logger = logging.getLogger(__name__)
+
+VERSIONED_MODELS = (models.TechEvent, models.ResearchOpportunity)
+VERSIONED_TABLES = {model.__tablename__ for model in VERSIONED_MODELS}
+
+versions_table = models.TableVersion.__table__
+
+
+def bump(connection, table_names):
+    """Record a change to ``table_names`` on ``connection``'s transaction."""
+    table_names = set(table_names) & VERSIONED_TABLES
+    if not table_names:
+        return
+    connection.execute(
+        update(versions_table)
+        .where(versions_table.c.table_name.in_(table_names))
+        .values(version=versions_table.c.version + 1, updated_at=datetime.datetime.utcnow())
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_tables(session, flush_context):
+    # new/dirty/deleted still describe what this flush just wrote
+    changed = {
+        obj.__tablename__
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, VERSIONED_MODELS)
+        and (obj in session.new or obj in session.deleted or session.is_modified(obj))
+    }
+    if changed:
+        bump(session.connection(), changed)
+
+
+def ensure_rows(engine):
+    """Create the version row for every versioned table that doesn't have one yet."""
+    with engine.begin() as conn:
+        existing = set(conn.execute(select(versions_table.c.table_name)).scalars())
+        missing = VERSIONED_TABLES - existing
+        if missing:
+            now = datetime.datetime.utcnow()
+            conn.execute(
+                insert(versions_table),
+                [{"table_name": name, "version": 0, "updated_at": now} for name in sorted(missing)]
+            )
+
+
+def _version_query(table_name):
+    return (
+        select(versions_table.c.version, versions_table.c.updated_at)
+        .where(versions_table.c.table_name == table_name)
+    )
+
+
+def current(table_name, engine=default_engine):
+    """``(version, updated_at)`` for a table, or ``None`` if it isn't tracked yet."""
+    with engine.connect() as conn:
+        row = conn.execute(_version_query(table_name)).first()
+    return tuple(row) if row else None
+
+
+async def current_async(table_name, engine=default_async_engine):
+    """:func:`current` for ``async def`` handlers."""
+    async with engine.connect() as conn:
+        row = (await conn.execute(_version_query(table_name))).first()
+    return tuple(row) if row else None
+
+
+def _etag_matches(if_none_match, etag):
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_response(request, response, table_name):
+    """Validate a conditional GET against ``table_name``'s version.
+
+    Returns a bare 304 response when the client's copy is current. Otherwise
+    sets ETag / Last-Modified on ``response`` and returns ``None`` so the
+    handler carries on.
+    """
+    try:
+        state = current(table_name)
+    except Exception as e:
+        logger.warning(f"Could not read version of {table_name}: {str(e)}")
+        return None
+    return _evaluate(request, response, table_name, state)
+
+
+async def conditional_response_async(request, response, table_name):
+    """:func:`conditional_response` for ``async def`` handlers."""
+    try:
+        state = await current_async(table_name)
+    except Exception as e:
+        logger.warning(f"Could not read version of {table_name}: {str(e)}")
+        return None
+    return _evaluate(request, response, table_name, state)
+
+
+def _evaluate(request, response, table_name, state):
+    if state is None:
+        return None
+
+    version, updated_at = state
+    etag = f'W/"{table_name}-{version}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(updated_at.replace(tzinfo=datetime.timezone.utc), usegmt=True),
+        # Cacheable, but always revalidated so clients see writes immediately
+        "Cache-Control": "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    not_modified = False
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            not_modified = updated_at.replace(microsecond=0) <= since
+        except (TypeError, ValueError):
+            pass
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,143 @@
+"""Fast JSON responses for the list and search endpoints.
+
+List endpoints select plain column tuples for just the fields they return
+(no identity map, no instance state, no unused Text columns), validate a
+whole page in one call to a prebuilt ``TypeAdapter`` and serialize it
+straight to bytes in pydantic-core. The default FastAPI path validates ORM
+objects one at a time, re-encodes them with ``jsonable_encoder`` and then
+runs ``json.dumps``.
+
+Responses can be trimmed to a sparse fieldset (``?fields=title,start_date``).
+``description`` is only sent when listed explicitly; lists carry the stored
+``summary`` instead.
+
+Both paths validate with the response schema's own validators.
+``FAST_JSON_RESPONSES=false`` switches back to the ORM path: whole
+``select(model)`` objects validated and serialized by FastAPI's
+``response_model`` machinery (restricted to the same fields), rendered like
+``JSONResponse``.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.exceptions import ResponseValidationError
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter, create_model
+from sqlalchemy import select
+from starlette.responses import Response
+
+import models
+import schemas
+
+# Column tuples through pydantic-core (true) or ORM objects through response_model (false)
+ENABLED = os.getenv("FAST_JSON_RESPONSES", "true").lower() in ("true", "1", "yes")
+
+# Large columns left out of list responses unless requested with ?fields=
+DEFERRED_FIELDS = frozenset({"description"})
+
+
+def _item_schema(schema, names):
+    """A subclass of ``schema`` whose fields outside ``names`` are optional.
+
+    Being a subclass, it keeps every validator of ``schema``; fields that
+    weren't selected are left unset and excluded when dumping.
+    """
+    optional = {
+        name: (Optional[field.annotation], None)
+        for name, field in schema.model_fields.items() if name not in names
+    }
+    return create_model(f"{schema.__name__}Fields", __base__=schema, **optional)
+
+
+class RowSerializer:
+    """Selects the columns behind a set of ``schema`` fields and serializes rows of them to JSON bytes."""
+
+    def __init__(self, model, schema, names=None):
+        if names is None:
+            names = tuple(name for name in schema.model_fields if name not in DEFERRED_FIELDS)
+        self.model = model
+        self.schema = schema
+        self.names = names
+        self.include = {"__all__": set(names)}
+        self.page_include = {
+            "items": self.include, **{name: True for name in schemas.Page.model_fields if name != "items"}
+        }
+        item_schema = _item_schema(schema, names)
+        self.list_adapter = TypeAdapter(List[item_schema])
+        self.page_adapter = TypeAdapter(schemas.Page[item_schema])
+        self.orm_list_field = create_model_field(name="Response", type_=List[schema], mode="serialization")
+        self.orm_page_field = create_model_field(name="Response", type_=schemas.Page[schema], mode="serialization")
+
+    def with_fields(self, fields):
+        """The serializer for a comma-separated ``?fields=`` value; ``self`` when it is empty."""
+        requested = {name.strip() for name in (fields or "").split(",") if name.strip()}
+        if not requested:
+            return self
+        unknown = requested - set(self.schema.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. "
+                       f"Choose from: {', '.join(self.schema.model_fields)}",
+            )
+        return self._subset(tuple(name for name in self.schema.model_fields if name in requested))
+
+    @lru_cache(maxsize=64)
+    def _subset(self, names):
+        return RowSerializer(self.model, self.schema, names)
+
+    @property
+    def columns(self):
+        """What to select: the columns behind the fields, or whole ORM objects with ``ENABLED`` off."""
+        if ENABLED:
+            return [self.model.__table__.c[name] for name in self.names]
+        return [self.model]
+
+    def select(self):
+        return select(*self.columns)
+
+    def _records(self, rows):
+        names = self.names
+        if len(names) == 1:
+            # page_result unwraps one-column items to the bare value
+            name = names[0]
+            return [{name: row} for row in rows]
+        return [dict(zip(names, row)) for row in rows]
+
+    @staticmethod
+    def _orm_response(field, content, include):
+        # What FastAPI's serialize_response and JSONResponse do for a response_model
+        value, errors = field.validate(content, {}, loc=("response",))
+        if errors:
+            raise ResponseValidationError(errors=errors if isinstance(errors, list) else [errors], body=content)
+        return json.dumps(
+            field.serialize(value, include=include), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    def dump_list(self, rows):
+        """Serialize rows selected with :attr:`columns`."""
+        if not ENABLED:
+            return self._orm_response(self.orm_list_field, list(rows), self.include)
+        return self.list_adapter.dump_json(
+            self.list_adapter.validate_python(self._records(rows)), include=self.include
+        )
+
+    def dump_page(self, page):
+        """Serialize a :func:`pagination.page_result` dict of rows selected with :attr:`columns`."""
+        if not ENABLED:
+            return self._orm_response(self.orm_page_field, page, self.page_include)
+        envelope = self.page_adapter.validate_python({**page, "items": self._records(page["items"])})
+        return self.page_adapter.dump_json(envelope, include=self.page_include)
+
+
+def json_response(body, response=None):
+    """A response for pre-encoded JSON, keeping headers set on the injected ``response``."""
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+events = RowSerializer(models.TechEvent, schemas.TechEvent)
+opportunities = RowSerializer(models.ResearchOpportunity, schemas.ResearchOpportunity)
@@ -0,0 +1,19 @@
+"""Gunicorn server hooks (loaded automatically from the working directory).
+
+Command-line options live in railway_start.sh; only hooks are defined here.
+"""
+import os
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (in-flight requests, pool occupancy)
+    # from the metrics other workers serve, see metrics.py
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+    # Its continuous profile would otherwise be summed forever, see profiling.py
+    from profiling import continuous_path
+    try:
+        os.remove(continuous_path(worker.pid))
+    except OSError:
+        pass
@@ -0,0 +1,59 @@
+"""Password hashing on a dedicated, bounded thread pool.
+
+bcrypt takes ~100ms+ of CPU per call. Running it on the event loop stalls
+every request in the worker, and running it on the shared request thread
+pool lets a login storm starve everything else. Hashes are computed on a
+small dedicated executor instead. When more than
+``PASSWORD_HASH_QUEUE_LIMIT`` calls are already waiting, new ones are shed
+with a 503 rather than queued without bound.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Threads are only started on first use, so this is safe to create before a fork
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT)
+
+
+def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _executor.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def verify_password(plain_password, hashed_password):
+    """Check a password from sync code (blocks the calling thread, not the event loop)."""
+    return _submit(pwd_context.verify, plain_password, hashed_password).result()
+
+
+def hash_password(password):
+    """Hash a password from sync code (blocks the calling thread, not the event loop)."""
+    return _submit(pwd_context.hash, password).result()
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await asyncio.wrap_future(_submit(pwd_context.verify, plain_password, hashed_password))
+
+
+async def hash_password_async(password):
+    return await asyncio.wrap_future(_submit(pwd_context.hash, password))
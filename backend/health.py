@@ -0,0 +1,106 @@
+"""Readiness from a background database probe.
+
+A thread runs ``SELECT 1`` every ``HEALTH_PROBE_INTERVAL`` seconds and keeps
+the last result. ``/readyz`` and ``/health`` report that result instead of
+opening a connection per health check, so checks cost no I/O however often
+the platform sends them. A worker is ready once a probe succeeded and the
+last successful one is no older than ``HEALTH_PROBE_MAX_AGE`` seconds. The
+age limit also catches a probe stuck waiting on a saturated pool.
+
+Each worker process probes for itself. The thread is started from the app's
+startup hook, so it lives in the worker, not in a pre-fork parent.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+HEALTH_PROBE_MAX_AGE = float(os.getenv("HEALTH_PROBE_MAX_AGE", str(3 * HEALTH_PROBE_INTERVAL)))
+
+
+class ReadinessProbe:
+    """Checks the database on an interval and caches the outcome."""
+
+    def __init__(self, engine, interval=HEALTH_PROBE_INTERVAL, max_age=HEALTH_PROBE_MAX_AGE):
+        self.engine = engine
+        self.interval = interval
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.last_ok = None       # monotonic time of the last successful probe
+        self.checked_at = None    # wall-clock time of the last probe
+        self.latency_ms = None
+        self.error = None
+
+    def probe(self):
+        """Run one check now and record the outcome."""
+        started = time.monotonic()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            error = None
+        except Exception as e:
+            error = str(e)
+        finished = time.monotonic()
+
+        with self._lock:
+            was_failing = self.error is not None
+            self.checked_at = datetime.now(timezone.utc)
+            self.latency_ms = round((finished - started) * 1000, 1)
+            self.error = error
+            if error is None:
+                self.last_ok = finished
+
+        # Log changes only, not every probe
+        if error is not None and not was_failing:
+            logger.warning("Database probe failed: %s", error)
+        elif error is None and was_failing:
+            logger.info("Database probe recovered", extra={"latency_ms": self.latency_ms})
+
+    def status(self):
+        """The cached outcome: ``ready`` plus details. Does no I/O."""
+        with self._lock:
+            age = None if self.last_ok is None else time.monotonic() - self.last_ok
+            ready = self.error is None and age is not None and age <= self.max_age
+            return {
+                "ready": ready,
+                "database": "unknown" if self.checked_at is None else ("connected" if self.error is None else "error"),
+                "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+                "latency_ms": self.latency_ms,
+                "last_ok_age_s": None if age is None else round(age, 1),
+                "error": self.error,
+            }
+
+    def start(self):
+        pid = os.getpid()
+        with self._lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="readiness-probe", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.probe()
+            self._stopping.wait(self.interval)
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+
+probe = ReadinessProbe(default_engine)
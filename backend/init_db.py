@@ -1,6 +1,6 @@
 from database import engine
-import models
+import schema
 
 print("Creating database tables...")
-models.Base.metadata.create_all(bind=engine)
-print("Database tables created successfully!") 
\ No newline at end of file
+schema.ensure_schema(engine)
+print("Database tables created successfully!")
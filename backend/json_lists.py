@@ -0,0 +1,138 @@
+"""One-time normalization of the ``JsonList`` columns.
+
+Older deploys stored these columns as TEXT (events, users) or generic JSON
+(opportunities), and some opportunity rows hold a JSON *string* that
+encodes the list (``"[\\"AI\\"]"``) or NULL. :func:`ensure_normalized`
+converts the columns to JSONB on PostgreSQL and rewrites every value that
+is not a JSON array into one, so readers can rely on getting a list. A
+column that is still not JSONB afterwards fails the schema step.
+
+Safe to run on every deploy: once nothing needs fixing it only checks
+column types and runs one ``LIMIT 1`` probe per column.
+"""
+import json
+import logging
+
+from sqlalchemy import Text, bindparam, case, cast, func, inspect, literal, or_, select, text, update
+
+import models
+
+logger = logging.getLogger(__name__)
+
+
+def _list_columns():
+    for table in models.Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, models.JsonList):
+                yield table, column
+
+
+def _as_list(raw):
+    """Decode a stored value (possibly JSON-encoded more than once) into a list."""
+    value = raw
+    for _ in range(3):
+        if not isinstance(value, str):
+            break
+        try:
+            value = json.loads(value)
+        except ValueError:
+            # Not JSON at all: keep the text as a single item rather than drop it
+            return [value] if value.strip() else []
+    return value if isinstance(value, list) else []
+
+
+def _not_a_list(column, dialect_name):
+    if dialect_name == "postgresql":
+        return or_(column.is_(None), func.jsonb_typeof(column) != "array")
+    # CASE keeps json_type() away from malformed values, which it rejects
+    raw = cast(column, Text)
+    return case(
+        (or_(raw.is_(None), func.json_valid(raw) == 0), literal(True)),
+        (func.json_type(raw) == "array", literal(False)),
+        else_=literal(True),
+    )
+
+
+def _column_type(conn, table, column):
+    return conn.execute(
+        text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+        ),
+        {"table": table.name, "column": column.name},
+    ).scalar()
+
+
+def _rewrite_invalid_json(conn, table, column):
+    """Turn TEXT values that aren't JSON into arrays, so the cast to JSONB can't fail on them."""
+    rows = conn.execute(
+        select(table.c.id, cast(column, Text)).where(column.is_not(None))
+    ).all()
+    fixed = []
+    for row_id, raw in rows:
+        try:
+            json.loads(raw)
+        except ValueError:
+            fixed.append({"_id": row_id, "_value": json.dumps(_as_list(raw))})
+    if not fixed:
+        return
+    values = {column.name: bindparam("_value", type_=Text)}
+    if "updated_at" in table.c:
+        values["updated_at"] = table.c.updated_at
+    conn.execute(update(table).where(table.c.id == bindparam("_id")).values(values), fixed)
+    logger.info(f"Rewrote {len(fixed)} {table.name}.{column.name} values that were not JSON")
+
+
+def _convert_to_jsonb(conn, table, column):
+    data_type = _column_type(conn, table, column)
+    if data_type is None or data_type == "jsonb":
+        return
+    logger.info(f"Converting {table.name}.{column.name} from {data_type} to jsonb")
+    if data_type != "json":
+        _rewrite_invalid_json(conn, table, column)
+    conn.execute(text(
+        f'ALTER TABLE {table.name} ALTER COLUMN "{column.name}" '
+        f'TYPE JSONB USING "{column.name}"::text::jsonb'
+    ))
+
+
+def ensure_normalized(engine):
+    """Convert list columns to JSONB on PostgreSQL and rewrite non-array values."""
+    dialect_name = engine.dialect.name
+    existing_tables = set(inspect(engine).get_table_names())
+    for table, column in _list_columns():
+        if table.name not in existing_tables:
+            continue
+        try:
+            with engine.begin() as conn:
+                if dialect_name == "postgresql":
+                    _convert_to_jsonb(conn, table, column)
+
+                needs_fixing = _not_a_list(column, dialect_name)
+                if conn.execute(select(literal(1)).where(needs_fixing).limit(1)).first() is None:
+                    continue
+
+                rows = conn.execute(
+                    select(table.c.id, cast(column, Text)).where(needs_fixing)
+                ).all()
+                values = {column.name: bindparam("_value", type_=column.type)}
+                if "updated_at" in table.c:
+                    # A format fix is not an edit: keep updated_at as it was
+                    values["updated_at"] = table.c.updated_at
+                conn.execute(
+                    update(table).where(table.c.id == bindparam("_id")).values(values),
+                    [{"_id": row_id, "_value": _as_list(raw)} for row_id, raw in rows],
+                )
+                logger.info(f"Normalized {len(rows)} {table.name}.{column.name} values to JSON arrays")
+        except Exception as e:
+            logger.error(f"Could not normalize {table.name}.{column.name}: {str(e)}")
+
+    if dialect_name == "postgresql":
+        # JsonList binds JSONB on PostgreSQL: writes to a column left as TEXT would fail
+        with engine.connect() as conn:
+            unconverted = [
+                f"{table.name}.{column.name}" for table, column in _list_columns()
+                if table.name in existing_tables and _column_type(conn, table, column) not in (None, "jsonb")
+            ]
+        if unconverted:
+            raise RuntimeError(f"List columns could not be converted to JSONB: {', '.join(unconverted)}")
@@ -0,0 +1,141 @@
+"""Application logging: JSON lines, written off the request path.
+
+Handlers only put records on an in-memory queue; a background listener
+thread formats them and writes them to stdout, so request handlers never
+block on stdout (which gunicorn ``--capture-output`` funnels through a
+single pipe).
+
+Configuration (environment):
+
+- ``LOG_LEVEL``: root level, default ``INFO``.
+- ``LOG_LEVELS``: per-logger levels, e.g. ``sqlalchemy.engine=WARNING,api.auth=DEBUG``.
+- ``LOG_SAMPLE``: keep only a fraction of DEBUG/INFO records for chatty loggers,
+  e.g. ``gunicorn.access=0.1``. Off by default. Warnings and errors are never
+  sampled out.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_queue = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra=`` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records with args merged and tracebacks pre-rendered, but unformatted."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Pass a ``rate`` fraction of records below WARNING; always pass the rest."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+def _parse_pairs(spec):
+    pairs = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+def _start_listener():
+    global _listener
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(_queue, handler, respect_handler_level=False)
+    _listener.start()
+
+
+def _restart_listener_after_fork():
+    # The listener thread does not survive fork (e.g. gunicorn --preload); the
+    # child gets a fresh queue and its own writer thread.
+    global _queue
+    if _listener is None:
+        return
+    _queue = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, _QueueHandler):
+            handler.queue = _queue
+    _start_listener()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging():
+    """Install the queue handler on the root logger. Safe to call more than once."""
+    global _queue
+    if _listener is not None:
+        return
+
+    _queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(_queue))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for name, level in _parse_pairs(os.getenv("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    for name, rate in _parse_pairs(os.getenv("LOG_SAMPLE")).items():
+        logging.getLogger(name).addFilter(SamplingFilter(float(rate)))
+
+    # Route uvicorn/gunicorn loggers through the same queue
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access", "gunicorn.error", "gunicorn.access"):
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.propagate = True
+
+    _start_listener()
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+    atexit.register(stop_logging)
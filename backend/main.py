@@ -3,38 +3,65 @@ from sqlalchemy.orm import Session
 from typing import List, Optional, Union
 from datetime import datetime, timedelta
 import models, schemas
-from database import engine, get_db, SessionLocal
+from database import engine, async_engine, get_db, SessionLocal, get_async_db, AsyncSessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import or_, and_, text
+from sqlalchemy import or_, and_, text, select, case
 from sqlalchemy.sql import func
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 import os
 import sys
 from fastapi.responses import JSONResponse
 from starlette.requests import Request
 from starlette.responses import Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import ValidationError, validator
-import direct_migration
-import json
+import search
+import pagination
+import schema
+import tags as tag_index
+import saved_items
+import counters
+from cache import TTLCache
+import etags
+import hashing
+import auth_cache
+import bulk_import
+import bulk_export
+import fast_json
+import db_pool
+import health
+import metrics
+import query_stats
+import profiling
+import logging
 
-# Only create tables automatically if specifically requested by environment variable
-# This prevents conflicts with railway_start.sh which also creates tables
-if os.getenv("AUTOCREATE_TABLES", "").lower() in ("true", "1", "yes"):
+logger = logging.getLogger("api")
+auth_logger = logging.getLogger("api.auth")
+
+# Run the schema step (create tables, migrate, backfill) in-process on startup.
+# Deploys run ``python schema.py`` once before starting the workers and turn
+# this off, so scaling out a replica doesn't repeat it in every worker.
+SCHEMA_ON_STARTUP = os.getenv("SCHEMA_ON_STARTUP", "true").lower() in ("true", "1", "yes")
+
+app = FastAPI(title="Tech Events API")
+
+# Create and upgrade tables for local runs (idempotent), see SCHEMA_ON_STARTUP
+@app.on_event("startup")
+async def ensure_schema():
+    if not SCHEMA_ON_STARTUP:
+        return
     try:
-        # Try to create tables but don't crash if it fails
-        print("Attempting to create database tables on startup...")
-        models.Base.metadata.create_all(bind=engine)
-        print("Database tables created or verified successfully on startup")
+        await run_in_threadpool(schema.ensure_schema, engine)
     except Exception as e:
-        print(f"Warning: Could not create database tables on startup: {str(e)}", file=sys.stderr)
-        print("Application will continue to start up; tables will be created later if possible")
-        # Don't raise the exception - allow the app to start
-else:
-    print("Skipping automatic table creation - will be handled by startup script")
+        logger.exception("Error upgrading database schema")
 
-app = FastAPI(title="Tech Events API")
+# Every worker looks up the full-text indexes itself (read-only), whether or
+# not it ran the schema step, so search doesn't fall back to LIKE scans
+@app.on_event("startup")
+async def check_search_index():
+    await run_in_threadpool(search.ready_tables, engine)
 
 # Add startup event to create default admin if none exists
 @app.on_event("startup")
@@ -51,10 +78,10 @@ async def create_default_admin():
         admin_exists = db.query(models.Admin).first()
         
         if not admin_exists:
-            print(f"No admin users found. Creating default admin user: {default_admin_username}")
+            logger.info("No admin users found, creating default admin user", extra={"username": default_admin_username})
             
             # Hash the password
-            hashed_password = get_password_hash(default_admin_password)
+            hashed_password = await hashing.hash_password_async(default_admin_password)
             
             # Create admin
             new_admin = models.Admin(
@@ -64,15 +91,40 @@ async def create_default_admin():
             
             db.add(new_admin)
             db.commit()
-            print(f"Default admin user '{default_admin_username}' created successfully!")
+            logger.info("Default admin user created", extra={"username": default_admin_username})
         else:
-            print("Admin user already exists. Skipping default admin creation.")
+            logger.info("Admin user already exists, skipping default admin creation")
     except Exception as e:
-        print(f"Error creating default admin: {str(e)}")
+        logger.exception("Error creating default admin")
         # Don't raise - allow application to start anyway
     finally:
         db.close()
 
+# Probe the database in the background so health checks never touch it
+@app.on_event("startup")
+def start_readiness_probe():
+    health.probe.start()
+
+@app.on_event("shutdown")
+def stop_readiness_probe():
+    health.probe.stop()
+
+# Low-rate stack sampling into PROFILE_DIR, see profiling.py
+@app.on_event("startup")
+def start_continuous_profiler():
+    if profiling.CONTINUOUS_PROFILING:
+        profiling.continuous.start()
+
+@app.on_event("shutdown")
+def stop_continuous_profiler():
+    if profiling.CONTINUOUS_PROFILING:
+        profiling.continuous.stop()
+
+# Write out buffered like/registration/application counts before the worker exits
+@app.on_event("shutdown")
+def flush_counters():
+    counters.buffer.stop()
+
 # Configure CORS - single implementation to avoid conflicts
 # Use a simple but comprehensive approach that works for all routes
 app.add_middleware(
@@ -85,6 +137,17 @@ app.add_middleware(
     max_age=86400,  # Cache preflight requests for 24 hours
 )
 
+# Per-request statement counts and DB time, slow-query and N+1 warnings
+app.add_middleware(query_stats.QueryStatsMiddleware)
+query_stats.instrument_engine(engine)
+query_stats.instrument_engine(async_engine.sync_engine)
+
+# Per-route latency, status and size metrics; added last so it is outermost and
+# also times CORS preflights. Served on /metrics.
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine, "sync")
+metrics.instrument_engine(async_engine.sync_engine, "async")
+
 # Simple CORS debug endpoint
 @app.get("/cors-debug")
 async def cors_debug():
@@ -94,7 +157,6 @@ async def cors_debug():
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")  # In production, use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Dependency to get database session
@@ -105,13 +167,6 @@ def get_db():
     finally:
         db.close()
 
-# Password hashing functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
 # Token functions
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -123,82 +178,114 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_admin(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def load_admin(db: AsyncSession, username: str):
+    """Admin principal for a token, from the principal cache when possible."""
+    admin = auth_cache.get_admin(username)
+    if admin is None:
+        admin = (await db.execute(
+            select(models.Admin).where(models.Admin.username == username)
+        )).scalars().first()
+        if admin is not None:
+            auth_cache.set_admin(admin)
+    return admin
+
+async def load_user(db: AsyncSession, user_id: int):
+    """User principal for a token, from the principal cache when possible."""
+    user = auth_cache.get_user(user_id)
+    if user is None:
+        user = await db.get(models.User, user_id)
+        if user is not None:
+            auth_cache.set_user(user)
+    return user
+
+async def get_current_admin(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        print(f"Validating admin token: {token[:10]}...")  # Log truncated token for debugging
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = auth_cache.decode_token(token, SECRET_KEY, ALGORITHM)
         username: str = payload.get("sub")
         user_type: str = payload.get("user_type", "user")
         if username is None or user_type != "admin":
-            print(f"Admin validation failed: wrong user type: {user_type}")
+            auth_logger.debug("Admin validation failed: wrong user type", extra={"user_type": user_type})
             raise credentials_exception
         token_data = schemas.TokenData(username=username, user_type=user_type)
     except JWTError as e:
-        print(f"JWT validation error: {str(e)}")
+        auth_logger.debug("JWT validation error: %s", e)
         raise credentials_exception
-    admin = db.query(models.Admin).filter(models.Admin.username == token_data.username).first()
+    admin = await load_admin(db, token_data.username)
     if admin is None:
-        print(f"Admin not found: {token_data.username}")
+        auth_logger.info("Admin not found", extra={"username": token_data.username})
         raise credentials_exception
     return admin
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def is_admin_token(token: str) -> bool:
+    """Whether ``token`` authenticates an admin (outside of dependency injection)."""
+    try:
+        async with AsyncSessionLocal() as db:
+            await get_current_admin(token, db)
+        return True
+    except HTTPException:
+        return False
+
+# Admins can profile a single request with X-Profile: 1 or ?profile=1 (see
+# profiling.py). Added after the other middleware, so it is outermost and
+# profiles all of them too.
+app.add_middleware(profiling.ProfilerMiddleware, authorize=is_admin_token)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        print(f"Validating user token: {token[:10]}...")  # Log truncated token for debugging
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = auth_cache.decode_token(token, SECRET_KEY, ALGORITHM)
         username: str = payload.get("sub")
         user_id: int = payload.get("user_id")
         user_type: str = payload.get("user_type", "user")
-        
-        print(f"Token payload: username={username}, user_id={user_id}, user_type={user_type}")
-        
+
         if username is None:
-            print("Username missing from token")
+            auth_logger.debug("Username missing from token")
             raise credentials_exception
         token_data = schemas.TokenData(username=username, user_id=user_id, user_type=user_type)
     except JWTError as e:
-        print(f"JWT validation error: {str(e)}")
+        auth_logger.debug("JWT validation error: %s", e)
         raise credentials_exception
         
     if token_data.user_type == "admin":
-        user = db.query(models.Admin).filter(models.Admin.username == token_data.username).first()
+        user = await load_admin(db, token_data.username)
         if user is None:
-            print(f"Admin not found: {token_data.username}")
+            auth_logger.info("Admin not found", extra={"username": token_data.username})
     else:
         if token_data.user_id is None:
-            print("User ID missing from token")
+            auth_logger.debug("User ID missing from token")
             raise credentials_exception
-        user = db.query(models.User).filter(models.User.id == token_data.user_id).first()
+        user = await load_user(db, token_data.user_id)
         if user is None:
-            print(f"User not found with ID: {token_data.user_id}")
+            auth_logger.info("User not found", extra={"user_id": token_data.user_id})
         
     if user is None:
         raise credentials_exception
-    
-    print(f"Authentication successful for {token_data.username}")
+
+    auth_logger.debug("Authentication successful", extra={"username": token_data.username})
     return user
 
 # Authentication endpoints
 @app.post("/token", response_model=schemas.Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate a user and return an access token.
     """
-    print(f"Login attempt for: {form_data.username}")
+    auth_logger.debug("Login attempt", extra={"username": form_data.username})
     
     # Check if it's an admin login
-    admin = db.query(models.Admin).filter(models.Admin.username == form_data.username).first()
-    if admin and verify_password(form_data.password, admin.hashed_password):
+    admin = (await db.execute(
+        select(models.Admin).where(models.Admin.username == form_data.username)
+    )).scalars().first()
+    if admin and await hashing.verify_password_async(form_data.password, admin.hashed_password):
         # Extend token expiration for admins
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES * 2)  # Double expiration for admins
         access_token = create_access_token(
@@ -206,7 +293,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
         
         # Log successful admin login
-        print(f"Admin login successful: {admin.username}")
+        auth_logger.info("Admin login successful", extra={"username": admin.username})
         
         return {
             "access_token": access_token,
@@ -216,20 +303,22 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         }
     
     # Check if it's a user login
-    user = db.query(models.User).filter(
-        (models.User.username == form_data.username) | (models.User.email == form_data.username)
-    ).first()
+    user = (await db.execute(
+        select(models.User).where(
+            (models.User.username == form_data.username) | (models.User.email == form_data.username)
+        )
+    )).scalars().first()
     
     if not user:
-        print(f"Login failed: User not found: {form_data.username}")
+        auth_logger.info("Login failed: user not found", extra={"username": form_data.username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(form_data.password, user.hashed_password):
-        print(f"Login failed: Incorrect password for user: {form_data.username}")
+    if not await hashing.verify_password_async(form_data.password, user.hashed_password):
+        auth_logger.info("Login failed: incorrect password", extra={"username": form_data.username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -237,7 +326,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
     
     # Log successful user login
-    print(f"User login successful: {user.username} (id: {user.id})")
+    auth_logger.info("User login successful", extra={"username": user.username, "user_id": user.id})
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -253,24 +342,27 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     }
 
 @app.post("/admin/create", response_model=schemas.Admin)
-def create_admin(admin: schemas.AdminCreate, db: Session = Depends(get_db)):
+async def create_admin(admin: schemas.AdminCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new admin user. This endpoint should only be accessible 
     by existing admins but currently is unprotected."""
-    db_admin = db.query(models.Admin).filter(models.Admin.username == admin.username).first()
+    db_admin = (await db.execute(
+        select(models.Admin).where(models.Admin.username == admin.username)
+    )).scalars().first()
     if db_admin:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = get_password_hash(admin.password)
+    # Awaited on the bounded hashing pool, so signups don't tie up the shared threadpool
+    hashed_password = await hashing.hash_password_async(admin.password)
     db_admin = models.Admin(username=admin.username, hashed_password=hashed_password)
     
     db.add(db_admin)
-    db.commit()
-    db.refresh(db_admin)
+    await db.commit()
+    await db.refresh(db_admin)
     return db_admin
 
 # User registration and profile management
 @app.post("/users/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         # Input validation
         if not user.email or not user.username or not user.password or not user.full_name:
@@ -280,7 +372,9 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
             )
         
         # Check if email already exists
-        db_user_email = db.query(models.User).filter(models.User.email == user.email).first()
+        db_user_email = (await db.execute(
+            select(models.User).where(models.User.email == user.email)
+        )).scalars().first()
         if db_user_email:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
@@ -288,7 +382,9 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
             )
         
         # Check if username already exists
-        db_user_username = db.query(models.User).filter(models.User.username == user.username).first()
+        db_user_username = (await db.execute(
+            select(models.User).where(models.User.username == user.username)
+        )).scalars().first()
         if db_user_username:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
@@ -296,23 +392,25 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
             )
         
         # Create the user
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await hashing.hash_password_async(user.password)
         db_user = models.User(
             email=user.email,
             username=user.username,
             hashed_password=hashed_password,
-            full_name=user.full_name
+            full_name=user.full_name,
+            # Loaded (empty) up front: the response reads it after the session is done
+            saved_items=[]
         )
         
         # Log registration attempt
-        print(f"Registering new user: {user.username} ({user.email})")
+        logger.debug("Registering new user", extra={"username": user.username})
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user, ["id", "created_at", "is_active", "interests"])
         
         # Log successful registration
-        print(f"User registered successfully: {user.username} (ID: {db_user.id})")
+        logger.info("User registered", extra={"username": user.username, "user_id": db_user.id})
         
         return db_user
     except HTTPException:
@@ -320,26 +418,34 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         # Log unexpected errors
-        print(f"Unexpected error during user registration: {str(e)}", file=sys.stderr)
+        logger.exception("Unexpected error during user registration")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"message": "An unexpected error occurred during registration"}
         )
 
-@app.get("/users/me", response_model=schemas.User)
-def read_users_me(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if hasattr(current_user, 'user_type') and current_user.user_type == "admin":
+def require_user_account(current_user):
+    """Profiles and saved items belong to user accounts; admins don't have any."""
+    if not isinstance(current_user, models.User):
         raise HTTPException(status_code=400, detail="Admin accounts don't have user profiles")
     return current_user
 
+@app.get("/users/me", response_model=schemas.User)
+def read_users_me(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    require_user_account(current_user)
+    # The authenticated principal is detached; load the profile (and its saved items) here
+    return db.get(models.User, current_user.id)
+
 @app.put("/users/me", response_model=schemas.User)
 def update_user(
     user_update: schemas.UserUpdate,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    if hasattr(current_user, 'user_type') and current_user.user_type == "admin":
-        raise HTTPException(status_code=400, detail="Admin accounts can't be updated through this endpoint")
+    require_user_account(current_user)
+    
+    # The authenticated principal is detached; update the row through this request's session
+    user = db.get(models.User, current_user.id)
     
     if user_update.email is not None:
         email_exists = db.query(models.User).filter(
@@ -348,23 +454,28 @@ def update_user(
         ).first()
         if email_exists:
             raise HTTPException(status_code=400, detail="Email already in use")
-        current_user.email = user_update.email
+        user.email = user_update.email
     
     if user_update.full_name is not None:
-        current_user.full_name = user_update.full_name
+        user.full_name = user_update.full_name
     
     if user_update.bio is not None:
-        current_user.bio = user_update.bio
+        user.bio = user_update.bio
     
     if user_update.interests is not None:
-        current_user.interests = user_update.interests
+        user.interests = user_update.interests
     
     if user_update.profile_image is not None:
-        current_user.profile_image = user_update.profile_image
+        user.profile_image = user_update.profile_image
     
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    db.refresh(user)
+    return user
+
+def require_saved_item(db: Session, kind: str, item_id: int):
+    if not saved_items.item_exists(db, kind, item_id):
+        detail = "Event not found" if kind == "event" else "Opportunity not found"
+        raise HTTPException(status_code=404, detail=detail)
 
 @app.post("/users/me/save-event/{event_id}")
 def save_event(
@@ -372,21 +483,11 @@ def save_event(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Check if event exists
-    event = db.query(models.TechEvent).filter(models.TechEvent.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if already saved
-    if event_id in current_user.saved_events:
-        # If already saved, remove it (toggle behavior)
-        current_user.saved_events.remove(event_id)
-    else:
-        # If not saved, add it
-        current_user.saved_events.append(event_id)
-    
-    db.commit()
-    return {"success": True}
+    """Toggle whether an event is saved."""
+    require_user_account(current_user)
+    require_saved_item(db, "event", event_id)
+    saved = saved_items.toggle_saved(db, current_user.id, "event", event_id)
+    return {"success": True, "saved": saved}
 
 @app.post("/users/me/save-opportunity/{opportunity_id}")
 def save_opportunity(
@@ -394,68 +495,188 @@ def save_opportunity(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Check if opportunity exists
-    opportunity = db.query(models.ResearchOpportunity).filter(models.ResearchOpportunity.id == opportunity_id).first()
-    if not opportunity:
-        raise HTTPException(status_code=404, detail="Opportunity not found")
-    
-    # Check if already saved
-    if opportunity_id in current_user.saved_opportunities:
-        # If already saved, remove it (toggle behavior)
-        current_user.saved_opportunities.remove(opportunity_id)
-    else:
-        # If not saved, add it
-        current_user.saved_opportunities.append(opportunity_id)
-    
-    db.commit()
-    return {"success": True}
+    """Toggle whether an opportunity is saved."""
+    require_user_account(current_user)
+    require_saved_item(db, "opportunity", opportunity_id)
+    saved = saved_items.toggle_saved(db, current_user.id, "opportunity", opportunity_id)
+    return {"success": True, "saved": saved}
+
+@app.put("/users/me/saved-events/{event_id}")
+def set_saved_event(
+    event_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Save an event. Idempotent."""
+    require_user_account(current_user)
+    require_saved_item(db, "event", event_id)
+    saved_items.set_saved(db, current_user.id, "event", event_id)
+    return {"success": True, "saved": True}
+
+@app.delete("/users/me/saved-events/{event_id}")
+def unset_saved_event(
+    event_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Unsave an event. Idempotent."""
+    require_user_account(current_user)
+    saved_items.unset_saved(db, current_user.id, "event", event_id)
+    return {"success": True, "saved": False}
+
+@app.put("/users/me/saved-opportunities/{opportunity_id}")
+def set_saved_opportunity(
+    opportunity_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Save an opportunity. Idempotent."""
+    require_user_account(current_user)
+    require_saved_item(db, "opportunity", opportunity_id)
+    saved_items.set_saved(db, current_user.id, "opportunity", opportunity_id)
+    return {"success": True, "saved": True}
+
+@app.delete("/users/me/saved-opportunities/{opportunity_id}")
+def unset_saved_opportunity(
+    opportunity_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Unsave an opportunity. Idempotent."""
+    require_user_account(current_user)
+    saved_items.unset_saved(db, current_user.id, "opportunity", opportunity_id)
+    return {"success": True, "saved": False}
+
+@app.get("/users/me/saved-events/status")
+def get_saved_events_status(
+    ids: List[int] = Query(..., max_length=pagination.MAX_PAGE_SIZE),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Which of a page of event ids the user has saved, e.g. ``?ids=1&ids=2``."""
+    require_user_account(current_user)
+    return {"saved": saved_items.saved_status(db, current_user.id, "event", ids)}
+
+@app.get("/users/me/saved-opportunities/status")
+def get_saved_opportunities_status(
+    ids: List[int] = Query(..., max_length=pagination.MAX_PAGE_SIZE),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Which of a page of opportunity ids the user has saved, e.g. ``?ids=1&ids=2``."""
+    require_user_account(current_user)
+    return {"saved": saved_items.saved_status(db, current_user.id, "opportunity", ids)}
 
 @app.get("/users/me/saved-events", response_model=List[schemas.TechEvent])
 def get_saved_events(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    events = db.query(models.TechEvent).filter(models.TechEvent.id.in_(current_user.saved_events)).all()
-    return events
+    require_user_account(current_user)
+    return db.execute(saved_items.saved_items_query(current_user.id, "event")).scalars().all()
 
 @app.get("/users/me/saved-opportunities", response_model=List[schemas.ResearchOpportunity])
 def get_saved_opportunities(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    opportunities = db.query(models.ResearchOpportunity).filter(
-        models.ResearchOpportunity.id.in_(current_user.saved_opportunities)
+    require_user_account(current_user)
+    return db.execute(saved_items.saved_items_query(current_user.id, "opportunity")).scalars().all()
+
+# Dashboard stats are served from a per-worker cache; writes (and counter flushes) invalidate it
+stats_cache = TTLCache(ttl=float(os.getenv("STATS_CACHE_TTL", "30")), maxsize=8)
+
+def invalidate_stats(*table_names):
+    for table_name in table_names:
+        stats_cache.pop(table_name)
+
+counters.buffer.on_flush.append(lambda table_names: invalidate_stats(*table_names))
+
+def aggregate_stats(db: Session, model, engagement_column: str, date_column):
+    """Compute all dashboard numbers for a table in a single GROUP BY (type, virtual) query."""
+    upcoming = case((date_column >= datetime.now(), 1), else_=0)
+    rows = db.execute(
+        select(
+            model.type,
+            model.virtual,
+            func.count(),
+            func.coalesce(func.sum(getattr(model, engagement_column)), 0),
+            func.coalesce(func.sum(model.likes), 0),
+            func.coalesce(func.sum(upcoming), 0),
+        ).group_by(model.type, model.virtual)
     ).all()
-    return opportunities
+    
+    totals = {"count": 0, "engagement": 0, "likes": 0, "upcoming": 0, "types": {}, "virtual_vs_physical": {}}
+    for type_, virtual, count, engagement, likes, upcoming_count in rows:
+        totals["count"] += count
+        totals["engagement"] += engagement
+        totals["likes"] += likes
+        totals["upcoming"] += upcoming_count
+        totals["types"][type_] = totals["types"].get(type_, 0) + count
+        totals["virtual_vs_physical"][virtual] = totals["virtual_vs_physical"].get(virtual, 0) + count
+    return totals
 
-@app.get("/events/", response_model=List[schemas.TechEvent])
-def get_events(
-    skip: int = 0,
-    limit: int = 20,
+# Sparse fieldset parameter shared by the list and search endpoints
+FIELDS_DESCRIPTION = "Comma-separated fields to return. description is only included when listed; summary is."
+
+# Sortable columns for the event list and their default direction (True = descending)
+EVENT_SORT_COLUMNS = {
+    "start_date": False,
+    "created_at": True,
+    "likes": True,
+}
+
+@app.get("/events/", response_model=List[schemas.TechEventListItem])
+async def get_events(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True, description="Use cursor instead"),
+    limit: int = Query(20, ge=1, le=pagination.MAX_PAGE_SIZE),
     sort_by: str = "start_date",
-    sort_order: str = "asc",
-    db: Session = Depends(get_db)
+    sort_order: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(models.TechEvent)
-    
-    # Apply sorting
-    if sort_by == "start_date":
-        query = query.order_by(models.TechEvent.start_date.asc())
-    elif sort_by == "created_at":
-        query = query.order_by(models.TechEvent.created_at.desc())
-    elif sort_by == "likes":
-        query = query.order_by(models.TechEvent.likes.desc())
-    
-    if sort_order == "desc":
-        query = query.order_by(getattr(models.TechEvent, sort_by).desc())
-    else:
-        query = query.order_by(getattr(models.TechEvent, sort_by).asc())
+    """List events, one keyset page at a time.
+
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header.
+    """
+    not_modified = await etags.conditional_response_async(request, response, models.TechEvent.__tablename__)
+    if not_modified:
+        return not_modified
     
-    return query.offset(skip).limit(limit).all()
+    if sort_by not in EVENT_SORT_COLUMNS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort_by must be one of: {', '.join(EVENT_SORT_COLUMNS)}"
+        )
+    descending = EVENT_SORT_COLUMNS[sort_by] if sort_order is None else sort_order == "desc"
+    keys = [
+        (getattr(models.TechEvent, sort_by), descending),
+        (models.TechEvent.id, descending),
+    ]
+    
+    serializer = fast_json.events.with_fields(fields)
+    query = serializer.select()
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    stmt, total = pagination.page_query(query, keys, cursor, limit)
+    rows = (await db.execute(stmt)).all()
+    page = pagination.page_result(rows, keys, cursor, limit, total)
+    
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return fast_json.json_response(serializer.dump_list(page["items"]), response)
 
 @app.get("/events/{event_id}", response_model=schemas.TechEvent)
-def get_event(event_id: int, db: Session = Depends(get_db)):
-    event = db.query(models.TechEvent).filter(models.TechEvent.id == event_id).first()
+async def get_event(event_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = await etags.conditional_response_async(request, response, models.TechEvent.__tablename__)
+    if not_modified:
+        return not_modified
+    
+    event = await db.get(models.TechEvent, event_id)
     if event is None:
         raise HTTPException(status_code=404, detail="Event not found")
     return event
@@ -467,9 +688,6 @@ def create_event(
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     try:
-        # Debug logging
-        print(f"Attempting to create event with data: {event}")
-
         # Basic validation - very simple and lenient
         # Only check if required fields exist but don't enforce strict validation
         required_fields = {"title", "organization", "description", "venue", "registration_link", 
@@ -483,15 +701,11 @@ def create_event(
             )
             
         # Log the event creation attempt
-        print(f"Admin {current_admin.username} creating event: {event.title}")
-        print(f"Event type received: {event.type} (valid: {isinstance(event.type, schemas.EventType)})")
+        logger.debug("Creating event", extra={"admin": current_admin.username, "title": event.title, "event_type": event.type})
         
         # Create the event
         event_dict = event.dict()
         
-        # Print the complete dictionary for debugging
-        print(f"Converted event dict: {event_dict}")
-        
         # Handle null arrays with defaults
         for field in ["tech_stack", "speakers", "tags"]:
             if field not in event_dict or event_dict[field] is None:
@@ -510,22 +724,23 @@ def create_event(
             db_event = models.TechEvent(**event_dict)
             db.add(db_event)
             db.commit()
+            invalidate_stats(models.TechEvent.__tablename__)
             db.refresh(db_event)
             
             # Log successful creation
-            print(f"Event created successfully: {db_event.id} - {db_event.title}")
+            logger.info("Event created", extra={"event_id": db_event.id, "title": db_event.title})
             
             return db_event
         except Exception as db_error:
             db.rollback()
-            print(f"Database error creating event: {str(db_error)}", file=sys.stderr)
+            logger.exception("Database error creating event")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail={"message": f"Database error: {str(db_error)}"}
             )
     except ValidationError as ve:
         # Handle Pydantic validation errors
-        print(f"Validation error: {str(ve)}", file=sys.stderr)
+        logger.warning("Validation error creating event: %s", ve)
         return JSONResponse(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             content={"message": f"Validation error: {str(ve)}"}
@@ -535,14 +750,41 @@ def create_event(
         raise
     except Exception as e:
         # Log unexpected errors
-        print(f"Error creating event: {str(e)}", file=sys.stderr)
+        logger.exception("Error creating event")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"message": f"An unexpected error occurred: {str(e)}"}
         )
 
-@app.get("/events/search/")
+async def run_import(request: Request, model, format: Optional[str], admin_username: str):
+    """Stream the request body into ``bulk_import.import_rows`` on a worker thread."""
+    import_format = bulk_import.detect_format(request.headers.get("content-type"), format)
+    report = await run_in_threadpool(
+        bulk_import.import_rows, engine, model, import_format, bulk_import.blocking_chunks(request.stream())
+    )
+    if report["inserted"]:
+        invalidate_stats(model.__tablename__)
+    logger.info(
+        "Bulk import finished",
+        extra={"admin": admin_username, "table": model.__tablename__, "inserted": report["inserted"], "failed": report["failed"]},
+    )
+    return report
+
+@app.post("/events/import", response_model=schemas.ImportReport)
+async def import_events(
+    request: Request,
+    format: Optional[str] = Query(None, description="ndjson or csv; defaults to the Content-Type"),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """
+    Bulk-create events from an NDJSON or CSV request body, validated like POST /events/.
+    """
+    return await run_import(request, models.TechEvent, format, current_admin.username)
+
+@app.get("/events/search/", response_model=schemas.Page[schemas.TechEventListItem])
 def search_events(
+    request: Request,
+    response: Response,
     query: Optional[str] = None,
     location: Optional[str] = None,
     type: Optional[schemas.EventType] = None,
@@ -551,20 +793,44 @@ def search_events(
     end_date_before: Optional[datetime] = None,
     tech_stack: Optional[List[str]] = Query(None),
     tags: Optional[List[str]] = Query(None),
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
-    events = db.query(models.TechEvent)
+    not_modified = etags.conditional_response(request, response, models.TechEvent.__tablename__)
+    if not_modified:
+        return not_modified
+    
+    events, keys = event_search_statement(
+        db.get_bind(), query, location, type, virtual,
+        start_date_after, end_date_before, tech_stack, tags,
+    )
+    serializer = fast_json.events.with_fields(fields)
+    events = events.with_only_columns(*serializer.columns)
+    stmt, total = pagination.page_query(events, keys, cursor, limit)
+    rows = db.execute(stmt).all()
+    if not cursor:
+        total = pagination.first_page_total(db, events, rows, limit)
+    page = pagination.page_result(rows, keys, cursor, limit, total)
+    return fast_json.json_response(serializer.dump_page(page), response)
+
+def event_search_statement(bind, query, location, type, virtual,
+                           start_date_after, end_date_before, tech_stack, tags):
+    """The filtered event select behind /events/search/ and /events/export/, with its sort keys."""
+    events = select(models.TechEvent)
     
     filters = []
+    rank = None
     
     if query:
-        filters.append(
-            or_(
-                models.TechEvent.title.ilike(f"%{query}%"),
-                models.TechEvent.description.ilike(f"%{query}%"),
-                models.TechEvent.organization.ilike(f"%{query}%")
-            )
+        matches, onclause, match_filter, rank = search.text_search(
+            models.TechEvent, query, bind
         )
+        if matches is not None:
+            events = events.join(matches, onclause)
+        if match_filter is not None:
+            filters.append(match_filter)
     
     if location:
         filters.append(models.TechEvent.location.ilike(f"%{location}%"))
@@ -581,38 +847,59 @@ def search_events(
     if end_date_before:
         filters.append(models.TechEvent.end_date <= end_date_before)
     
-    if tech_stack:
-        for tech in tech_stack:
-            filters.append(models.TechEvent.tech_stack.contains([tech]))
-    
-    if tags:
-        for tag in tags:
-            filters.append(models.TechEvent.tags.contains([tag]))
+    # Exact, case-insensitive tag matches; multiple values must all be present
+    for facet, values in (("tech_stack", tech_stack), ("tags", tags)):
+        if values:
+            tag_filter = tag_index.tag_filter(models.TechEvent, facet, values)
+            if tag_filter is not None:
+                filters.append(tag_filter)
     
     if filters:
-        events = events.filter(and_(*filters))
+        events = events.where(and_(*filters))
     
-    return events.order_by(models.TechEvent.start_date.asc()).all()
+    # Best matches first when searching by text, then chronologically
+    keys = [(models.TechEvent.start_date, False), (models.TechEvent.id, False)]
+    if rank is not None:
+        keys.insert(0, (rank, False))
+    return events, keys
+
+@app.get("/events/export/")
+def export_events(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    query: Optional[str] = None,
+    location: Optional[str] = None,
+    type: Optional[schemas.EventType] = None,
+    virtual: Optional[bool] = None,
+    start_date_after: Optional[datetime] = None,
+    end_date_before: Optional[datetime] = None,
+    tech_stack: Optional[List[str]] = Query(None),
+    tags: Optional[List[str]] = Query(None),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """
+    Stream every event matching the /events/search/ filters as NDJSON or CSV.
+    """
+    events, keys = event_search_statement(
+        engine, query, location, type, virtual,
+        start_date_after, end_date_before, tech_stack, tags,
+    )
+    return bulk_export.export_response(engine, events, keys, format, "events")
 
 @app.get("/events/stats/")
 def get_stats(db: Session = Depends(get_db)):
-    total_events = db.query(models.TechEvent).count()
-    total_attendees = db.query(func.sum(models.TechEvent.attendees)).scalar() or 0
-    total_likes = db.query(func.sum(models.TechEvent.likes)).scalar() or 0
-    
-    types = db.query(models.TechEvent.type, func.count()).group_by(models.TechEvent.type).all()
-    virtual_vs_physical = db.query(models.TechEvent.virtual, func.count()).group_by(models.TechEvent.virtual).all()
-    
-    upcoming_events = db.query(models.TechEvent).filter(models.TechEvent.start_date >= datetime.now()).count()
-    
-    return {
-        "total_events": total_events,
-        "total_attendees": total_attendees,
-        "total_likes": total_likes,
-        "types": dict(types),
-        "virtual_vs_physical": dict(virtual_vs_physical),
-        "upcoming_events": upcoming_events
-    }
+    stats = stats_cache.get(models.TechEvent.__tablename__)
+    if stats is None:
+        totals = aggregate_stats(db, models.TechEvent, "attendees", models.TechEvent.start_date)
+        stats = {
+            "total_events": totals["count"],
+            "total_attendees": totals["engagement"],
+            "total_likes": totals["likes"],
+            "types": totals["types"],
+            "virtual_vs_physical": totals["virtual_vs_physical"],
+            "upcoming_events": totals["upcoming"]
+        }
+        stats_cache.set(models.TechEvent.__tablename__, stats)
+    return stats
 
 @app.put("/events/{event_id}", response_model=schemas.TechEvent)
 def update_event(
@@ -629,6 +916,7 @@ def update_event(
         setattr(db_event, key, value)
     
     db.commit()
+    invalidate_stats(models.TechEvent.__tablename__)
     db.refresh(db_event)
     return db_event
 
@@ -643,71 +931,77 @@ def delete_event(
         raise HTTPException(status_code=404, detail="Event not found")
     db.delete(db_event)
     db.commit()
+    invalidate_stats(models.TechEvent.__tablename__)
     return {"message": "Event deleted"}
 
+def increment_counter(model, column: str, item_id: int, not_found: str):
+    """Buffer a +1 on a counter column and return the value including unflushed clicks."""
+    value = counters.buffer.increment(model, column, item_id)
+    if value is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return value
+
 @app.post("/events/{event_id}/like")
-def like_event(event_id: int, db: Session = Depends(get_db)):
-    event = db.query(models.TechEvent).filter(models.TechEvent.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    event.likes += 1
-    db.commit()
-    return {"message": "Event liked successfully", "likes": event.likes}
+def like_event(event_id: int):
+    likes = increment_counter(models.TechEvent, "likes", event_id, "Event not found")
+    return {"message": "Event liked successfully", "likes": likes}
 
 @app.post("/events/{event_id}/register")
-def register_for_event(event_id: int, db: Session = Depends(get_db)):
-    event = db.query(models.TechEvent).filter(models.TechEvent.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    event.attendees += 1
-    db.commit()
-    return {"message": "Successfully registered for event", "attendees": event.attendees}
+def register_for_event(event_id: int):
+    attendees = increment_counter(models.TechEvent, "attendees", event_id, "Event not found")
+    return {"message": "Successfully registered for event", "attendees": attendees}
 
-@app.get("/opportunities/", response_model=List[schemas.ResearchOpportunity])
-def read_opportunities(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/opportunities/", response_model=List[schemas.ResearchOpportunityListItem])
+async def read_opportunities(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True, description="Use cursor instead"),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List opportunities by deadline, one keyset page at a time.
+
+    The cursor for the next page is returned in the ``X-Next-Cursor`` header.
+    """
+    not_modified = await etags.conditional_response_async(request, response, models.ResearchOpportunity.__tablename__)
+    if not_modified:
+        return not_modified
+    
+    keys = [
+        (models.ResearchOpportunity.deadline, False),
+        (models.ResearchOpportunity.id, False),
+    ]
+    serializer = fast_json.opportunities.with_fields(fields)
     try:
-        opportunities = db.query(models.ResearchOpportunity).order_by(
-            models.ResearchOpportunity.deadline.asc()
-        ).offset(skip).limit(limit).all()
+        query = serializer.select()
+        if skip and not cursor:
+            query = query.offset(skip)
         
-        # Process JSON arrays before returning
-        for opportunity in opportunities:
-            for field in ["requirements", "fields", "tags"]:
-                if hasattr(opportunity, field):
-                    value = getattr(opportunity, field)
-                    if isinstance(value, str):
-                        try:
-                            setattr(opportunity, field, json.loads(value))
-                        except:
-                            setattr(opportunity, field, [])
-                    elif value is None:
-                        setattr(opportunity, field, [])
+        stmt, total = pagination.page_query(query, keys, cursor, limit)
+        rows = (await db.execute(stmt)).all()
+        page = pagination.page_result(rows, keys, cursor, limit, total)
         
-        return opportunities
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+        return fast_json.json_response(serializer.dump_list(page["items"]), response)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error fetching opportunities: {str(e)}")
+        logger.exception("Error fetching opportunities")
         return []
 
 @app.get("/opportunities/{opportunity_id}", response_model=schemas.ResearchOpportunity)
-def read_opportunity(opportunity_id: int, db: Session = Depends(get_db)):
-    db_opportunity = db.query(models.ResearchOpportunity).filter(models.ResearchOpportunity.id == opportunity_id).first()
+async def read_opportunity(opportunity_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = await etags.conditional_response_async(request, response, models.ResearchOpportunity.__tablename__)
+    if not_modified:
+        return not_modified
+    
+    db_opportunity = await db.get(models.ResearchOpportunity, opportunity_id)
     if db_opportunity is None:
         raise HTTPException(status_code=404, detail="Opportunity not found")
     
-    # Process JSON arrays before returning
-    for field in ["requirements", "fields", "tags"]:
-        if hasattr(db_opportunity, field):
-            value = getattr(db_opportunity, field)
-            if isinstance(value, str):
-                try:
-                    setattr(db_opportunity, field, json.loads(value))
-                except:
-                    setattr(db_opportunity, field, [])
-            elif value is None:
-                setattr(db_opportunity, field, [])
-    
     return db_opportunity
 
 @app.post("/opportunities/", response_model=schemas.ResearchOpportunity)
@@ -717,8 +1011,7 @@ def create_opportunity(
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     try:
-        print(f"Attempting to create opportunity with data: {opportunity}")
-        print(f"Admin {current_admin.username} creating opportunity: {opportunity.title}")
+        logger.debug("Creating opportunity", extra={"admin": current_admin.username, "title": opportunity.title})
         
         # Clean website URL - remove any trailing semicolons
         if hasattr(opportunity, 'website') and opportunity.website:
@@ -733,32 +1026,34 @@ def create_opportunity(
         # Add, commit, refresh
         db.add(db_opportunity)
         db.commit()
+        invalidate_stats(models.ResearchOpportunity.__tablename__)
         db.refresh(db_opportunity)
         
-        # Process JSON arrays before returning
-        for field in ["requirements", "fields", "tags"]:
-            if hasattr(db_opportunity, field):
-                value = getattr(db_opportunity, field)
-                if isinstance(value, str):
-                    try:
-                        setattr(db_opportunity, field, json.loads(value))
-                    except:
-                        setattr(db_opportunity, field, [])
-                elif value is None:
-                    setattr(db_opportunity, field, [])
-        
         return db_opportunity
         
     except Exception as e:
         db.rollback()
-        print(f"Error creating opportunity: {str(e)}")
+        logger.exception("Error creating opportunity")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating opportunity: {str(e)}"
         )
 
-@app.get("/opportunities/search/")
+@app.post("/opportunities/import", response_model=schemas.ImportReport)
+async def import_opportunities(
+    request: Request,
+    format: Optional[str] = Query(None, description="ndjson or csv; defaults to the Content-Type"),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """
+    Bulk-create opportunities from an NDJSON or CSV request body, validated like POST /opportunities/.
+    """
+    return await run_import(request, models.ResearchOpportunity, format, current_admin.username)
+
+@app.get("/opportunities/search/", response_model=schemas.Page[schemas.ResearchOpportunityListItem])
 def search_opportunities(
+    request: Request,
+    response: Response,
     query: Optional[str] = None,
     location: Optional[str] = None,
     type: Optional[schemas.OpportunityType] = None,
@@ -766,20 +1061,43 @@ def search_opportunities(
     deadline_after: Optional[datetime] = None,
     fields: Optional[List[str]] = Query(None),
     tags: Optional[List[str]] = Query(None),
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    # ``fields`` is already the research-field filter here
+    response_fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
-    opportunities = db.query(models.ResearchOpportunity)
+    not_modified = etags.conditional_response(request, response, models.ResearchOpportunity.__tablename__)
+    if not_modified:
+        return not_modified
+    
+    opportunities, keys = opportunity_search_statement(
+        db.get_bind(), query, location, type, virtual, deadline_after, fields, tags,
+    )
+    serializer = fast_json.opportunities.with_fields(response_fields)
+    opportunities = opportunities.with_only_columns(*serializer.columns)
+    stmt, total = pagination.page_query(opportunities, keys, cursor, limit)
+    rows = db.execute(stmt).all()
+    if not cursor:
+        total = pagination.first_page_total(db, opportunities, rows, limit)
+    page = pagination.page_result(rows, keys, cursor, limit, total)
+    return fast_json.json_response(serializer.dump_page(page), response)
+
+def opportunity_search_statement(bind, query, location, type, virtual, deadline_after, fields, tags):
+    """The filtered opportunity select behind /opportunities/search/ and /opportunities/export/, with its sort keys."""
+    opportunities = select(models.ResearchOpportunity)
     
     filters = []
+    rank = None
     
     if query:
-        filters.append(
-            or_(
-                models.ResearchOpportunity.title.ilike(f"%{query}%"),
-                models.ResearchOpportunity.description.ilike(f"%{query}%"),
-                models.ResearchOpportunity.organization.ilike(f"%{query}%")
-            )
+        matches, onclause, match_filter, rank = search.text_search(
+            models.ResearchOpportunity, query, bind
         )
+        if matches is not None:
+            opportunities = opportunities.join(matches, onclause)
+        if match_filter is not None:
+            filters.append(match_filter)
     
     if location:
         filters.append(models.ResearchOpportunity.location.ilike(f"%{location}%"))
@@ -793,38 +1111,59 @@ def search_opportunities(
     if deadline_after:
         filters.append(models.ResearchOpportunity.deadline >= deadline_after)
     
-    if fields:
-        for field in fields:
-            filters.append(models.ResearchOpportunity.fields.contains([field]))
-    
-    if tags:
-        for tag in tags:
-            filters.append(models.ResearchOpportunity.tags.contains([tag]))
+    # Exact, case-insensitive tag matches; multiple values must all be present
+    for facet, values in (("fields", fields), ("tags", tags)):
+        if values:
+            tag_filter = tag_index.tag_filter(models.ResearchOpportunity, facet, values)
+            if tag_filter is not None:
+                filters.append(tag_filter)
     
     if filters:
-        opportunities = opportunities.filter(and_(*filters))
+        opportunities = opportunities.where(and_(*filters))
     
-    return opportunities.order_by(models.ResearchOpportunity.deadline.asc()).all()
+    # Best matches first when searching by text, then by deadline
+    keys = [(models.ResearchOpportunity.deadline, False), (models.ResearchOpportunity.id, False)]
+    if rank is not None:
+        keys.insert(0, (rank, False))
+    return opportunities, keys
+
+@app.get("/opportunities/export/")
+def export_opportunities(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    query: Optional[str] = None,
+    location: Optional[str] = None,
+    type: Optional[schemas.OpportunityType] = None,
+    virtual: Optional[bool] = None,
+    deadline_after: Optional[datetime] = None,
+    fields: Optional[List[str]] = Query(None),
+    tags: Optional[List[str]] = Query(None),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """
+    Stream every opportunity matching the /opportunities/search/ filters as NDJSON or CSV.
+    """
+    opportunities, keys = opportunity_search_statement(
+        engine, query, location, type, virtual, deadline_after, fields, tags,
+    )
+    return bulk_export.export_response(engine, opportunities, keys, format, "opportunities")
 
 @app.get("/opportunities/stats/")
 def get_opportunity_stats(db: Session = Depends(get_db)):
-    total_opportunities = db.query(models.ResearchOpportunity).count()
-    total_applications = db.query(func.sum(models.ResearchOpportunity.applications)).scalar() or 0
-    total_likes = db.query(func.sum(models.ResearchOpportunity.likes)).scalar() or 0
-    
-    types = db.query(models.ResearchOpportunity.type, func.count()).group_by(models.ResearchOpportunity.type).all()
-    virtual_vs_physical = db.query(models.ResearchOpportunity.virtual, func.count()).group_by(models.ResearchOpportunity.virtual).all()
-    
-    upcoming_opportunities = db.query(models.ResearchOpportunity).filter(models.ResearchOpportunity.deadline >= datetime.now()).count()
-    
-    return {
-        "total_opportunities": total_opportunities,
-        "total_applications": total_applications,
-        "total_likes": total_likes,
-        "types": dict(types),
-        "virtual_vs_physical": dict(virtual_vs_physical),
-        "upcoming_opportunities": upcoming_opportunities
-    }
+    stats = stats_cache.get(models.ResearchOpportunity.__tablename__)
+    if stats is None:
+        totals = aggregate_stats(
+            db, models.ResearchOpportunity, "applications", models.ResearchOpportunity.deadline
+        )
+        stats = {
+            "total_opportunities": totals["count"],
+            "total_applications": totals["engagement"],
+            "total_likes": totals["likes"],
+            "types": totals["types"],
+            "virtual_vs_physical": totals["virtual_vs_physical"],
+            "upcoming_opportunities": totals["upcoming"]
+        }
+        stats_cache.set(models.ResearchOpportunity.__tablename__, stats)
+    return stats
 
 @app.put("/opportunities/{opportunity_id}", response_model=schemas.ResearchOpportunity)
 def update_opportunity(
@@ -849,24 +1188,13 @@ def update_opportunity(
             setattr(db_opportunity, key, value)
         
         db.commit()
+        invalidate_stats(models.ResearchOpportunity.__tablename__)
         db.refresh(db_opportunity)
         
-        # Process JSON arrays before returning
-        for field in ["requirements", "fields", "tags"]:
-            if hasattr(db_opportunity, field):
-                value = getattr(db_opportunity, field)
-                if isinstance(value, str):
-                    try:
-                        setattr(db_opportunity, field, json.loads(value))
-                    except:
-                        setattr(db_opportunity, field, [])
-                elif value is None:
-                    setattr(db_opportunity, field, [])
-        
         return db_opportunity
     except Exception as e:
         db.rollback()
-        print(f"Error updating opportunity: {str(e)}")
+        logger.exception("Error updating opportunity")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating opportunity: {str(e)}"
@@ -883,101 +1211,138 @@ def delete_opportunity(
         raise HTTPException(status_code=404, detail="Opportunity not found")
     db.delete(db_opportunity)
     db.commit()
+    invalidate_stats(models.ResearchOpportunity.__tablename__)
     return {"message": "Opportunity deleted"}
 
 @app.post("/opportunities/{opportunity_id}/like")
-def like_opportunity(opportunity_id: int, db: Session = Depends(get_db)):
-    db_opportunity = db.query(models.ResearchOpportunity).filter(models.ResearchOpportunity.id == opportunity_id).first()
-    if not db_opportunity:
-        raise HTTPException(status_code=404, detail="Opportunity not found")
-    db_opportunity.likes += 1
-    db.commit()
+def like_opportunity(opportunity_id: int):
+    increment_counter(models.ResearchOpportunity, "likes", opportunity_id, "Opportunity not found")
     return {"message": "Like recorded"}
 
 @app.post("/opportunities/{opportunity_id}/apply")
-def apply_for_opportunity(opportunity_id: int, db: Session = Depends(get_db)):
-    db_opportunity = db.query(models.ResearchOpportunity).filter(models.ResearchOpportunity.id == opportunity_id).first()
-    if not db_opportunity:
-        raise HTTPException(status_code=404, detail="Opportunity not found")
-    db_opportunity.applications += 1
-    db.commit()
+def apply_for_opportunity(opportunity_id: int):
+    increment_counter(models.ResearchOpportunity, "applications", opportunity_id, "Opportunity not found")
     return {"message": "Application recorded"}
 
-# Add health check endpoint for Railway
+# Liveness: the process is up and serving. No I/O, so it never fails because
+# the database is slow or a pool is busy.
+@app.get("/livez")
+async def liveness():
+    return {"status": "ok"}
+
+# Readiness: the last background database probe (see health.py), plus pool
+# occupancy. 503 until a probe succeeds or when the last success is too old.
+@app.get("/readyz")
+async def readiness():
+    probe = health.probe.status()
+    body = {
+        "status": "ready" if probe["ready"] else "not ready",
+        **probe,
+        "pools": {
+            "sync": db_pool.pool_status(engine),
+            "async": db_pool.pool_status(async_engine.sync_engine),
+        },
+    }
+    return JSONResponse(body, status_code=200 if probe["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+# Prometheus text format, summed over all workers when PROMETHEUS_MULTIPROC_DIR is set
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health")
-def health_check():
+async def health_check():
     """
-    Health check endpoint for Railway deployment monitoring.
-    Returns a 200 OK response if the application is running.
-    Also checks database connection to ensure the application is fully functional.
+    Health summary for monitoring, from the cached background database probe.
+    Always returns 200 so a database outage doesn't cycle containers; use
+    /readyz to gate traffic and /livez for liveness.
     """
-    import sys
-    import time
-    import os
-    
-    start_time = time.time()
-    db_status = "unknown"
-    db_message = ""
-    
-    try:
-        # Simple database check - just ping the database
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))  # Use text() to properly construct the SQL
-        db.close()
-        db_status = "connected"
-    except Exception as e:
-        # Log the error but still return 200 to prevent container restarts
-        db_status = "error"
-        db_message = str(e)
-        print(f"Health check database error: {str(e)}", file=sys.stderr)
-    
-    # Calculate response time
-    response_time_ms = round((time.time() - start_time) * 1000)
-    
-    # Get current port from environment or default
-    current_port = os.getenv("PORT", "8080")
-    
-    # Always return 200 OK to prevent container cycling
+    probe = health.probe.status()
     response = {
-        "status": "degraded" if db_status == "error" else "healthy",
+        "status": "healthy" if probe["ready"] else "degraded",
         "uptime": "ok",
         "timestamp": datetime.now().isoformat(),
-        "database": db_status,
+        "database": probe["database"],
         "version": "1.3",
-        "response_time_ms": response_time_ms,
-        "port": current_port
+        "response_time_ms": probe["latency_ms"],
+        "port": os.getenv("PORT", "8080"),
     }
-    
-    if db_message:
-        response["db_message"] = db_message
-    
-    # Log the health check request and response
-    print(f"Health check: status={response['status']}, db={db_status}, port={current_port}, time={response_time_ms}ms")
-    
+    if probe["error"]:
+        response["db_message"] = probe["error"]
     return response
 
+@app.get("/admin/db-pool")
+def db_pool_status(current_admin: models.Admin = Depends(get_current_admin)):
+    """
+    Connection pool sizing, occupancy and checkout wait times of the worker
+    that serves the request (each worker has its own pools).
+    """
+    return {
+        "pid": os.getpid(),
+        "workers": db_pool.WEB_CONCURRENCY,
+        "max_connections": db_pool.DB_MAX_CONNECTIONS,
+        "engines": {
+            "sync": db_pool.pool_status(engine),
+            "async": db_pool.pool_status(async_engine.sync_engine),
+        },
+    }
+
+@app.get("/admin/profiles")
+def list_request_profiles(current_admin: models.Admin = Depends(get_current_admin)):
+    """
+    Stored request profiles, newest first. Profile a request by sending it
+    with an admin token and X-Profile: 1; its id comes back in X-Profile-Id.
+    """
+    return profiling.list_profiles()
+
+@app.get("/admin/profiles/continuous")
+def continuous_profile(
+    format: str = Query("folded", description="folded (flamegraph.pl/speedscope) or tree"),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """
+    Always-on low-rate samples of every worker in this replica, summed.
+    """
+    counts = profiling.load_continuous()
+    return profile_response(counts, format)
+
+@app.get("/admin/profiles/{profile_id}")
+def request_profile(
+    profile_id: str,
+    format: str = Query("folded", description="folded (flamegraph.pl/speedscope) or tree"),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    header, counts = profile
+    if format == "tree":
+        return {**header, "tree": profiling.call_tree(counts)}
+    return profile_response(counts, format)
+
+def profile_response(counts, format):
+    if format == "tree":
+        return profiling.call_tree(counts)
+    if format != "folded":
+        raise HTTPException(status_code=400, detail="format must be one of: folded, tree")
+    body = "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    return Response(content=body, media_type="text/plain")
+
 # This code is used when running the application directly
 # It ensures the app binds to the PORT environment variable for Railway deployment
 if __name__ == "__main__":
     import uvicorn
-    import sys
     
     # IMPORTANT: Default to 8080 to match Railway's expected port
     port = int(os.getenv("PORT", "8080"))
     
-    print(f"Starting server on port {port}", file=sys.stdout)
-    print(f"Environment PORT variable is set to: {os.getenv('PORT', 'not set')}", file=sys.stdout)
+    logger.info("Starting server on port %s (PORT=%s)", port, os.getenv("PORT", "not set"))
     
     try:
-        # Run the direct migration on startup
-        try:
-            direct_migration.run_direct_migration()
-        except Exception as e:
-            print(f"Failed to run direct migration: {str(e)}")
-            # Continue execution even if migration fails
-        
-        uvicorn.run("main:app", host="0.0.0.0", port=port, log_level="info")
+        # log_config=None keeps uvicorn's loggers on our queue handler
+        uvicorn.run("main:app", host="0.0.0.0", port=port, log_level="info", log_config=None)
     except Exception as e:
-        print(f"Failed to start server: {str(e)}", file=sys.stderr)
+        logger.exception("Failed to start server")
         # Don't raise, allow Railway to restart the container
         sys.exit(1)
@@ -0,0 +1,164 @@
+"""Prometheus metrics: per-route HTTP latency and sizes, plus engine/pool stats.
+
+:class:`MetricsMiddleware` records every request under its route template
+(``/events/{event_id}``, not the raw path, so the label set stays bounded):
+
+- ``http_requests_total`` by method, route and status,
+- ``http_request_duration_seconds`` and ``http_response_size_bytes``
+  histograms by method and route,
+- ``http_requests_in_progress`` by method.
+
+:func:`instrument_engine` adds query counts, pool checkouts, checkout wait
+and timeouts (from :mod:`db_pool`), and checked-out / overflow gauges.
+
+Under gunicorn every worker has its own counters. With
+``PROMETHEUS_MULTIPROC_DIR`` set (``railway_start.sh`` does), they are
+written to files there and ``/metrics`` sums them across the workers, so a
+scrape sees the whole replica no matter which worker answers it. The
+directory must be empty at startup, and ``gunicorn.conf.py`` drops an
+exited worker's live gauges.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+import db_pool
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+# Requests that matched no route share one label value
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time until the last response byte was sent.",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size.", ["method", "route"], buckets=SIZE_BUCKETS,
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled.", ["method"], multiprocess_mode="livesum",
+)
+
+DB_QUERIES = Counter("db_queries_total", "Statements executed.", ["engine"])
+DB_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool.", ["engine"])
+DB_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_seconds", "Time to check a connection out of the pool.",
+    ["engine"], buckets=CHECKOUT_BUCKETS,
+)
+DB_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after the pool timeout.", ["engine"]
+)
+DB_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out.", ["engine"], multiprocess_mode="livesum",
+)
+DB_OVERFLOW = Gauge(
+    "db_pool_overflow", "Overflow connections open beyond pool_size.", ["engine"], multiprocess_mode="livesum",
+)
+
+
+def _observe_checkout(name, seconds):
+    if seconds is None:
+        DB_CHECKOUT_TIMEOUTS.labels(name).inc()
+    else:
+        DB_CHECKOUT_WAIT.labels(name).observe(seconds)
+
+
+db_pool.CheckoutStats.observers.append(_observe_checkout)
+
+
+def instrument_engine(engine, name):
+    """Count ``engine``'s statements and track its pool under ``engine=name``."""
+    queries = DB_QUERIES.labels(name)
+    checkouts = DB_CHECKOUTS.labels(name)
+    checked_out = DB_CHECKED_OUT.labels(name)
+    overflow = DB_OVERFLOW.labels(name)
+
+    def overflow_gauge():
+        pool = engine.pool
+        if hasattr(pool, "overflow"):
+            overflow.set(max(0, pool.overflow()))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.inc()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+        checked_out.inc()
+        overflow_gauge()
+
+    # Fires before the connection is back in the pool, so the pool's own
+    # counts still include it: track checked-out connections ourselves
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+        overflow_gauge()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (streams pass through untouched) timing each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            # The router stores the matched route in the scope it was given
+            route = scope.get("route")
+            route = getattr(route, "path", None) or UNMATCHED_ROUTE
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_DURATION.labels(method, route).observe(elapsed)
+            RESPONSE_SIZE.labels(method, route).observe(size)
+
+
+def render():
+    """``(body, content type)`` of the current metrics, summed over workers when multiprocess."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
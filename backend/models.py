@@ -1,24 +1,48 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, func, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, func, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import json
-from sqlalchemy.types import TypeDecorator, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
 from database import Base
 from schemas import EventType, OpportunityType
 import datetime
 
-# Custom type for storing lists as JSON in SQLite
+try:
+    import orjson
+
+    def _dumps(value):
+        return orjson.dumps(value).decode()
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    _dumps = json.dumps
+    _loads = json.loads
+
+# List of JSON values: native JSONB on PostgreSQL, JSON text elsewhere
 class JsonList(TypeDecorator):
     impl = Text
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
     
     def process_bind_param(self, value, dialect):
         if value is None:
-            return '[]'
-        return json.dumps(value)
+            value = []
+        if dialect.name == "postgresql":
+            # JSONB encodes it
+            return value
+        return _dumps(value)
         
     def process_result_value(self, value, dialect):
         if value is None:
             return []
-        return json.loads(value)
+        if dialect.name == "postgresql":
+            return value
+        return _loads(value)
 
 class Admin(Base):
     __tablename__ = "admins"
@@ -40,18 +64,50 @@ class User(Base):
     profile_image = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     interests = Column(JsonList, default=[])
-    saved_events = Column(JsonList, default=[])
-    saved_opportunities = Column(JsonList, default=[])
+    # Superseded by user_saved_items; only read to backfill it
+    legacy_saved_events = Column("saved_events", JsonList, default=[])
+    legacy_saved_opportunities = Column("saved_opportunities", JsonList, default=[])
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    saved_items = relationship("SavedItem", cascade="all, delete-orphan", passive_deletes=True)
+
+    @property
+    def saved_events(self):
+        return [item.item_id for item in self.saved_items if item.kind == "event"]
+
+    @property
+    def saved_opportunities(self):
+        return [item.item_id for item in self.saved_items if item.kind == "opportunity"]
+
+class SavedItem(Base):
+    """An event or opportunity saved by a user. The unique key makes saves idempotent."""
+    __tablename__ = "user_saved_items"
+    __table_args__ = (
+        UniqueConstraint("user_id", "kind", "item_id", name="uq_user_saved_items"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)  # "event" or "opportunity"
+    item_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
 class TechEvent(Base):
     __tablename__ = "tech_events"
+    __table_args__ = (
+        # Composite indexes backing keyset pagination on each sortable column
+        Index("ix_tech_events_start_date_id", "start_date", "id"),
+        Index("ix_tech_events_created_at_id", "created_at", "id"),
+        Index("ix_tech_events_likes_id", "likes", "id"),
+        # Tag filters go through item_tags (see tags.py), not the list columns
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     organization = Column(String, index=True)
     description = Column(Text)
+    summary = Column(String, nullable=True)  # Derived from description, see summaries.py
     venue = Column(String)
     registration_link = Column(String)
     start_date = Column(DateTime)
@@ -70,6 +126,10 @@ class TechEvent(Base):
 
 class ResearchOpportunity(Base):
     __tablename__ = "research_opportunities"
+    __table_args__ = (
+        # Composite index backing keyset pagination by deadline
+        Index("ix_research_opportunities_deadline_id", "deadline", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -77,16 +137,44 @@ class ResearchOpportunity(Base):
     title = Column(String, index=True)
     organization = Column(String)
     description = Column(String)
+    summary = Column(String, nullable=True)  # Derived from description, see summaries.py
     type = Column(String)
     location = Column(String)
     deadline = Column(DateTime)
     duration = Column(String)
     compensation = Column(String)
-    requirements = Column(JSON, default=list)
-    fields = Column(JSON, default=list)
+    requirements = Column(JsonList, default=list)
+    fields = Column(JsonList, default=list)
     contact_email = Column(String, nullable=True)
     website = Column(String, nullable=True)
     virtual = Column(Boolean, default=False)
-    tags = Column(JSON, default=list)
+    tags = Column(JsonList, default=list)
     applications = Column(Integer, default=0)
-    likes = Column(Integer, default=0)
\ No newline at end of file
+    likes = Column(Integer, default=0)
+
+class ItemTag(Base):
+    """Normalized (case-folded) tag values, one row per item/facet/tag.
+
+    Backs exact, indexed tech_stack / tags / fields filters. The primary key
+    doubles as the lookup index for "items with tag X in facet Y".
+    """
+    __tablename__ = "item_tags"
+    __table_args__ = (
+        Index("ix_item_tags_kind_item_id", "kind", "item_id"),
+    )
+
+    kind = Column(String, primary_key=True)  # "event" or "opportunity"
+    facet = Column(String, primary_key=True)  # "tech_stack", "tags" or "fields"
+    value = Column(String, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+
+class TableVersion(Base):
+    """Per-table change counter, bumped in the same transaction as every catalogue write.
+
+    Drives ETag / Last-Modified for the event and opportunity endpoints.
+    """
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
@@ -0,0 +1,141 @@
+"""Keyset (cursor) pagination helpers.
+
+A page is fetched by ordering on a list of sort keys that ends with a unique
+column (normally ``id``) and seeking past the last key values of the previous
+page, so page N costs the same as page 1. Cursors are opaque url-safe tokens
+that carry those key values, plus the total count computed on the first page.
+
+Totals are only counted up to ``PAGE_TOTAL_CAP`` matches, so a broad search
+never has to find (or sort) every match just to report how many there are.
+Past the cap the page reports ``total_capped`` with the cap as its total.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, func, select, type_coerce, String, DateTime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+PAGE_TOTAL_CAP = int(os.getenv("PAGE_TOTAL_CAP", "1000"))
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values, total=None):
+    payload = {"k": [_encode_value(v) for v in values]}
+    if total is not None:
+        payload["t"] = total
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, key_count):
+    """Return ``(key_values, total)`` for a cursor token, or raise a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload["k"]]
+        if len(values) != key_count:
+            raise ValueError("cursor does not match this ordering")
+        return values, payload.get("t")
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def _raw(expression):
+    """Compare datetime keys as stored, without DateTime processing.
+
+    SQLite stores ``server_default=func.now()`` timestamps without
+    microseconds while Python-side values get them, so re-binding a parsed
+    datetime would not match the stored string. Round-tripping the raw
+    value keeps the seek condition consistent with ORDER BY.
+    """
+    if isinstance(expression.type, DateTime):
+        return type_coerce(expression, String)
+    return expression
+
+
+def _after(keys, values):
+    """Lexicographic "row comes after ``values``" condition for ``keys``."""
+    clauses = []
+    for i, (expression, descending) in enumerate(keys):
+        equal_prefix = [_raw(keys[j][0]) == values[j] for j in range(i)]
+        expression = _raw(expression)
+        step = expression < values[i] if descending else expression > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def page_query(stmt, keys, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Turn ``stmt`` into a single keyset-paginated query.
+
+    ``keys`` is a list of ``(expression, descending)`` pairs. The returned
+    statement selects the original columns followed by the sort keys.
+    Returns ``(stmt, total_from_cursor)``.
+    """
+    total = None
+    if cursor:
+        values, total = decode_cursor(cursor, len(keys))
+        stmt = stmt.where(_after(keys, values))
+
+    stmt = stmt.order_by(*[e.desc() if d else e.asc() for e, d in keys])
+    stmt = stmt.add_columns(*[_raw(e).label(f"_page_key_{i}") for i, (e, _) in enumerate(keys)])
+
+    # One extra row tells us whether there is a next page without a count query
+    return stmt.limit(limit + 1), total
+
+
+def count_query(stmt):
+    """Count the rows of ``stmt`` (unordered, unpaginated), stopping one past ``PAGE_TOTAL_CAP``."""
+    return select(func.count()).select_from(stmt.order_by(None).limit(PAGE_TOTAL_CAP + 1).subquery())
+
+
+def first_page_total(db, stmt, rows, limit=DEFAULT_PAGE_SIZE):
+    """The total for the first page of ``stmt``.
+
+    Free when every match fits on the page; otherwise one :func:`count_query`.
+    """
+    if len(rows) <= limit:
+        return len(rows)
+    return db.execute(count_query(stmt)).scalar()
+
+
+def page_result(rows, keys, cursor=None, limit=DEFAULT_PAGE_SIZE, total=None):
+    """Split rows fetched with :func:`page_query` into a page envelope dict."""
+    key_count = len(keys)
+    width = len(rows[0]) if rows else 0
+    item_width = width - key_count
+
+    page_rows = rows[:limit]
+    items = [row[0] if item_width == 1 else row[:item_width] for row in page_rows]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = page_rows[-1]
+        # The count travels in the cursor so later pages report the same total
+        next_cursor = encode_cursor(last[item_width:item_width + key_count], total)
+
+    capped = total is not None and total > PAGE_TOTAL_CAP
+    return {
+        "items": items,
+        "total": PAGE_TOTAL_CAP if capped else total,
+        "total_capped": capped,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,403 @@
+"""Sampling profiler: on demand for one request, and always-on at a low rate.
+
+Both take stack samples of the worker's threads with
+``sys._current_frames()``. This covers async handlers on the event loop and
+sync handlers in the threadpool alike, which a per-thread profiler such as
+cProfile misses. Threads blocked waiting (on a lock, queue or selector) are
+skipped (judged by the line they are blocked on), so samples show where
+time is spent working. Samples are
+aggregated as folded stacks (``frame;frame;frame count``), which
+flamegraph.pl, speedscope and inferno read directly.
+
+- **Per request**: an admin sends ``X-Profile: 1`` (or ``?profile=1``) with
+  their bearer token. The request is sampled every ``PROFILE_REQUEST_INTERVAL``
+  seconds and stored under ``PROFILE_DIR``. The response carries
+  ``X-Profile-Id``, and ``/admin/profiles/{id}`` returns the profile. The
+  sampler sees the whole worker, so requests running concurrently in the
+  same worker show up too.
+- **Continuous**: unless ``CONTINUOUS_PROFILING=false``, each worker samples
+  every ``PROFILE_SAMPLE_INTERVAL`` seconds and rewrites
+  ``PROFILE_DIR/continuous-<pid>.folded`` with the running totals every
+  ``PROFILE_FLUSH_INTERVAL`` seconds. Only files of live processes are
+  summed; the others are removed, so exited workers and earlier deploys
+  don't keep adding to the aggregate.
+"""
+import linecache
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "profiles"))
+PROFILE_REQUEST_INTERVAL = float(os.getenv("PROFILE_REQUEST_INTERVAL", "0.005"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+CONTINUOUS_PROFILING = os.getenv("CONTINUOUS_PROFILING", "true").lower() in ("true", "1", "yes")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.1"))
+PROFILE_FLUSH_INTERVAL = float(os.getenv("PROFILE_FLUSH_INTERVAL", "60"))
+# Distinct stacks kept by the continuous sampler; the rest are counted as one
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "20000"))
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+CONTINUOUS_FILE = re.compile(r"continuous-(\d+)\.folded")
+TRUNCATED_STACK = "[other stacks]"
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# A thread whose innermost Python frame is on a line like these is blocked
+# waiting for work (queue gets, lock/condition waits, selector polls), not
+# working. Blocking database calls don't match, so time spent waiting on
+# the database still shows up.
+IDLE_CALL = re.compile(r"\b(get|get_nowait|wait|acquire|select|poll|dequeue|join|sleep)\(")
+
+
+@lru_cache(maxsize=4096)
+def _short_path(path):
+    if path.startswith(BACKEND_DIR + os.sep):
+        return os.path.relpath(path, BACKEND_DIR)
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return os.path.basename(path)
+
+
+@lru_cache(maxsize=4096)
+def _is_idle_line(filename, lineno):
+    return IDLE_CALL.search(linecache.getline(filename, lineno)) is not None
+
+
+def _is_idle(frame):
+    return _is_idle_line(frame.f_code.co_filename, frame.f_lineno)
+
+
+def _folded(frame, thread_name):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    names.reverse()
+    return ";".join(names)
+
+
+def sample(counts, skip=(), max_stacks=None):
+    """Add one sample of every working thread's stack to ``counts``."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    for ident, frame in sys._current_frames().items():
+        if ident in skip or _is_idle(frame):
+            continue
+        stack = _folded(frame, names.get(ident, "thread"))
+        if max_stacks is not None and stack not in counts and len(counts) >= max_stacks:
+            stack = TRUNCATED_STACK
+        counts[stack] += 1
+
+
+class StackSampler:
+    """Samples stacks on its own thread every ``interval`` seconds into ``counts``."""
+
+    def __init__(self, interval, max_stacks=None, name="stack-sampler"):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.name = name
+        self.counts = Counter()
+        self.samples = 0
+        self.lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        skip = {threading.get_ident()}
+        while not self._stopping.wait(self.interval):
+            with self.lock:
+                sample(self.counts, skip, self.max_stacks)
+                self.samples += 1
+            self.tick()
+
+    def tick(self):
+        pass
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+
+def _write_folded(path, counts, header=None):
+    # Write then rename, so readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        for key, value in (header or {}).items():
+            f.write(f"# {key}: {value}\n")
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+    os.replace(tmp_path, path)
+
+
+def read_folded(path):
+    """``(header dict, Counter of folded stacks)`` of a profile file (header lines are ``# key: value``)."""
+    header = {}
+    counts = Counter()
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("# "):
+                key, _, value = line[2:].partition(": ")
+                header[key] = value
+                continue
+            stack, _, count = line.rpartition(" ")
+            if stack:
+                counts[stack] += int(count)
+    return header, counts
+
+
+def call_tree(counts):
+    """Folded stacks as a nested ``{"name", "samples", "children"}`` tree, heaviest first."""
+    root = {"name": "all", "samples": 0, "children": {}}
+    for stack, count in counts.items():
+        root["samples"] += count
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"name": name, "samples": 0, "children": {}})
+            node["samples"] += count
+
+    def finish(node):
+        children = sorted(node["children"].values(), key=lambda child: -child["samples"])
+        return {"name": node["name"], "samples": node["samples"], "children": [finish(c) for c in children]}
+
+    return finish(root)
+
+
+# Per-request profiles
+
+def _request_dir():
+    path = os.path.join(PROFILE_DIR, "requests")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def save_profile(profile_id, counts, header):
+    """Store a request profile as folded stacks, header lines first (``# key: value``)."""
+    directory = _request_dir()
+    _write_folded(os.path.join(directory, f"{profile_id}.folded"), counts, header)
+
+    # Keep the newest PROFILE_KEEP
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".folded")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def load_profile(profile_id):
+    """``(header dict, Counter of folded stacks)``, or ``None`` if there is no such profile."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(_request_dir(), f"{profile_id}.folded")
+    if not os.path.exists(path):
+        return None
+    return read_folded(path)
+
+
+def list_profiles():
+    """Headers of the stored request profiles, newest first."""
+    entries = sorted(
+        (entry for entry in os.scandir(_request_dir()) if entry.name.endswith(".folded")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    profiles = []
+    for entry in entries:
+        header = {"id": entry.name[:-len(".folded")]}
+        try:
+            with open(entry.path) as f:
+                for line in f:
+                    if not line.startswith("# "):
+                        break
+                    key, _, value = line[2:].rstrip("\n").partition(": ")
+                    header[key] = value
+        except OSError:
+            # Pruned by another worker since the listing
+            continue
+        profiles.append(header)
+    return profiles
+
+
+def _requested(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            return value.strip().lower() in (b"1", b"true", b"yes")
+    query_string = scope.get("query_string", b"")
+    if b"profile=" not in query_string:
+        return False
+    query = parse_qs(query_string.decode("latin-1"))
+    return query.get("profile", [""])[-1].lower() in ("1", "true", "yes")
+
+
+def _bearer_token(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token.strip()
+    return None
+
+
+class ProfilerMiddleware:
+    """Profiles requests that ask for it, when ``authorize(token)`` accepts their bearer token.
+
+    Requests that ask without an admin token are served normally, unprofiled.
+    """
+
+    def __init__(self, app, authorize):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+        token = _bearer_token(scope)
+        if token is None or not await self.authorize(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = None
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler = StackSampler(PROFILE_REQUEST_INTERVAL, name="request-profiler")
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            header = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "samples": sampler.samples,
+                "interval_ms": PROFILE_REQUEST_INTERVAL * 1000,
+                "pid": os.getpid(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            try:
+                await anyio.to_thread.run_sync(save_profile, profile_id, sampler.counts, header)
+            except OSError as e:
+                logger.error("Could not store request profile: %s", e)
+
+
+# Continuous profiling
+
+class ContinuousProfiler(StackSampler):
+    """Low-rate sampler that periodically writes this worker's running totals to disk."""
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL, flush_interval=PROFILE_FLUSH_INTERVAL):
+        super().__init__(interval, max_stacks=PROFILE_MAX_STACKS, name="continuous-profiler")
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._pid = None
+
+    @property
+    def path(self):
+        return continuous_path(os.getpid())
+
+    def start(self):
+        # Started from the app's startup hook, i.e. in each worker after fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        super().start()
+
+    def tick(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counts = Counter(self.counts)
+        self._last_flush = time.monotonic()
+        if not counts:
+            return
+        try:
+            _write_folded(self.path, counts)
+        except OSError as e:
+            logger.error("Could not write continuous profile: %s", e)
+
+    def stop(self):
+        super().stop()
+        self.flush()
+
+
+def continuous_path(pid):
+    return os.path.join(PROFILE_DIR, f"continuous-{pid}.folded")
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by someone else
+        return True
+    return True
+
+
+def load_continuous():
+    """The continuous samples of every live worker that wrote to ``PROFILE_DIR``, summed.
+
+    Files left by processes that are gone are deleted instead of counted.
+    """
+    counts = Counter()
+    if not os.path.isdir(PROFILE_DIR):
+        return counts
+    for entry in os.scandir(PROFILE_DIR):
+        match = CONTINUOUS_FILE.fullmatch(entry.name)
+        if not match:
+            continue
+        if not _is_running(int(match.group(1))):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            continue
+        try:
+            counts.update(read_folded(entry.path)[1])
+        except (OSError, ValueError):
+            # Rewritten by its worker while we read it
+            continue
+    return counts
+
+
+continuous = ContinuousProfiler()
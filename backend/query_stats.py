@@ -0,0 +1,162 @@
+"""Per-request SQL statement counts, DB time, and slow-query / N+1 warnings.
+
+:class:`QueryStatsMiddleware` gives each request a :class:`RequestQueries` (a
+context variable, so sync handlers in the threadpool and async sessions see
+the same one). Cursor-execute listeners on the engines add every statement
+to it. When the request finishes:
+
+- statements slower than ``SLOW_QUERY_MS`` have already been logged with the
+  shape of their bound parameters (types, never values),
+- the same statement run ``N_PLUS_ONE_THRESHOLD`` or more times is logged
+  as a likely N+1 (lazy loads or a query in a loop),
+- a request running more than ``QUERY_COUNT_WARN`` statements is logged.
+
+Every request's count and DB time are logged at DEBUG. With
+``DEBUG_QUERY_HEADERS=true``, responses also carry ``X-DB-Queries`` and a
+``Server-Timing: db;dur=...`` header (shown by browser dev tools). Leave it
+off in production.
+"""
+import contextvars
+import logging
+import os
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+QUERY_COUNT_WARN = int(os.getenv("QUERY_COUNT_WARN", "30"))
+DEBUG_QUERY_HEADERS = os.getenv("DEBUG_QUERY_HEADERS", "false").lower() in ("true", "1", "yes")
+
+# Statements are logged up to this many characters
+STATEMENT_LOG_LENGTH = 500
+
+_current = contextvars.ContextVar("request_queries", default=None)
+
+
+class RequestQueries:
+    """Statements run while handling one request."""
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """``(statement, times)`` for statements run at least ``threshold`` times."""
+        return [(statement, times) for statement, times in self.statements.most_common() if times >= threshold]
+
+
+def current():
+    """The :class:`RequestQueries` of the request being handled, if any."""
+    return _current.get()
+
+
+def _shape(value):
+    if isinstance(value, dict):
+        return {key: type(item).__name__ for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [type(item).__name__ for item in value]
+    return type(value).__name__
+
+
+def parameter_shape(parameters, executemany=False):
+    """Types of the bound parameters, without their values (which may be personal data)."""
+    if executemany:
+        return {"rows": len(parameters), "row": _shape(parameters[0]) if parameters else None}
+    return _shape(parameters)
+
+
+def _truncate(statement):
+    statement = " ".join(statement.split())
+    if len(statement) > STATEMENT_LOG_LENGTH:
+        return statement[:STATEMENT_LOG_LENGTH] + "…"
+    return statement
+
+
+def instrument_engine(engine):
+    """Time ``engine``'s statements and count them against the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        queries = _current.get()
+        if queries is not None:
+            queries.add(statement, seconds)
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            logger.warning(
+                "Slow query",
+                extra={
+                    "duration_ms": round(seconds * 1000, 1),
+                    "statement": _truncate(statement),
+                    "parameters": parameter_shape(parameters, executemany),
+                },
+            )
+
+    # A failed statement never reaches after_cursor_execute
+    @event.listens_for(engine, "handle_error")
+    def on_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def _report(scope, queries):
+    method, path = scope["method"], scope["path"]
+    db_ms = round(queries.seconds * 1000, 1)
+    for statement, times in queries.repeated():
+        logger.warning(
+            "Possible N+1: statement repeated %d times in one request", times,
+            extra={"method": method, "path": path, "times": times, "statement": _truncate(statement)},
+        )
+    if queries.count > QUERY_COUNT_WARN:
+        logger.warning(
+            "Request ran %d queries", queries.count,
+            extra={"method": method, "path": path, "queries": queries.count, "db_ms": db_ms},
+        )
+    logger.debug("Request queries", extra={"method": method, "path": path, "queries": queries.count, "db_ms": db_ms})
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware collecting each HTTP request's statements."""
+
+    def __init__(self, app, debug_headers=DEBUG_QUERY_HEADERS):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                # Statements run while a streaming body is sent aren't included
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(queries.count).encode()))
+                headers.append((b"server-timing", f"db;dur={queries.seconds * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.debug_headers else send)
+        finally:
+            _current.reset(token)
+            _report(scope, queries)
@@ -1,30 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas
-from ..database import get_db
-from passlib.context import CryptContext
+from ..database import get_async_db
+from .. import hashing
 from .. import models, schemas
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 @router.post("/signup", response_model=schemas.UserResponse)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(
-        (models.User.email == user.email) |
-        (models.User.username == user.username)
-    ).first()
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(
+        select(models.User).where(
+            (models.User.email == user.email) |
+            (models.User.username == user.username)
+        )
+    )).scalars().first()
     
     if db_user:
         raise HTTPException(status_code=400, detail="Username or email already registered")
     
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await hashing.hash_password_async(user.password)
     new_user = models.User(**user.dict(exclude={"password"}), password=hashed_password)
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 from backend import models, schemas
@@ -0,0 +1,148 @@
+"""Saved events and opportunities, stored one row per (user, kind, item).
+
+Set, unset and toggle are single indexed statements, and the unique key on
+``(user_id, kind, item_id)`` makes concurrent saves idempotent. ``item_id``
+has no foreign key (it points at either table), so deleting an event or
+opportunity removes its saved rows in the same flush.
+"""
+import logging
+
+from sqlalchemy import select, insert, delete, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+import models
+
+logger = logging.getLogger(__name__)
+
+SAVED_KINDS = {
+    "event": models.TechEvent,
+    "opportunity": models.ResearchOpportunity,
+}
+
+BACKFILL_BATCH_SIZE = 1000
+
+saved_table = models.SavedItem.__table__
+
+
+def _after_delete(mapper, connection, target):
+    kind = next(kind for kind, model in SAVED_KINDS.items() if model is mapper.class_)
+    connection.execute(
+        delete(saved_table).where(saved_table.c.kind == kind, saved_table.c.item_id == target.id)
+    )
+
+
+for _model in SAVED_KINDS.values():
+    event.listen(_model, "after_delete", _after_delete)
+
+
+def item_exists(db, kind, item_id):
+    model = SAVED_KINDS[kind]
+    return db.execute(select(model.id).where(model.id == item_id)).first() is not None
+
+
+def _insert_ignoring_duplicates(dialect):
+    if dialect == "postgresql":
+        return postgresql.insert(saved_table).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(saved_table).on_conflict_do_nothing()
+    return None
+
+
+def set_saved(db, user_id, kind, item_id):
+    """Save an item; saving it twice is a no-op."""
+    values = {"user_id": user_id, "kind": kind, "item_id": item_id}
+    stmt = _insert_ignoring_duplicates(db.get_bind().dialect.name)
+    if stmt is not None:
+        db.execute(stmt.values(**values))
+        db.commit()
+        return
+    try:
+        db.execute(insert(saved_table).values(**values))
+        db.commit()
+    except IntegrityError:
+        # Already saved (possibly by a concurrent request)
+        db.rollback()
+
+
+def unset_saved(db, user_id, kind, item_id):
+    """Unsave an item; returns whether it was saved."""
+    result = db.execute(
+        delete(saved_table).where(
+            saved_table.c.user_id == user_id,
+            saved_table.c.kind == kind,
+            saved_table.c.item_id == item_id,
+        )
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+def toggle_saved(db, user_id, kind, item_id):
+    """Flip the saved state of an item; returns the new state."""
+    if unset_saved(db, user_id, kind, item_id):
+        return False
+    set_saved(db, user_id, kind, item_id)
+    return True
+
+
+def saved_status(db, user_id, kind, item_ids):
+    """Map each of ``item_ids`` to whether the user has saved it, in one query."""
+    item_ids = set(item_ids)
+    saved = set(db.execute(
+        select(saved_table.c.item_id).where(
+            saved_table.c.user_id == user_id,
+            saved_table.c.kind == kind,
+            saved_table.c.item_id.in_(item_ids),
+        )
+    ).scalars())
+    return {item_id: item_id in saved for item_id in sorted(item_ids)}
+
+
+def saved_items_query(user_id, kind):
+    """Select the saved items of one kind for a user, newest save first."""
+    model = SAVED_KINDS[kind]
+    return (
+        select(model)
+        .join(saved_table, saved_table.c.item_id == model.id)
+        .where(saved_table.c.user_id == user_id, saved_table.c.kind == kind)
+        .order_by(saved_table.c.created_at.desc(), saved_table.c.id.desc())
+    )
+
+
+def ensure_backfilled(engine):
+    """Copy the legacy JSON saved lists into user_saved_items once."""
+    users = models.User.__table__
+    with engine.begin() as conn:
+        if conn.execute(select(saved_table.c.id).limit(1)).first() is not None:
+            return
+        result = conn.execution_options(yield_per=BACKFILL_BATCH_SIZE).execute(
+            select(users.c.id, users.c.saved_events, users.c.saved_opportunities)
+        )
+        count = 0
+        for batch in result.partitions():
+            rows = []
+            for user_id, events, opportunities in batch:
+                for kind, item_ids in (("event", events), ("opportunity", opportunities)):
+                    for item_id in dict.fromkeys(item_ids or []):
+                        rows.append({"user_id": user_id, "kind": kind, "item_id": item_id})
+            if rows:
+                conn.execute(insert(saved_table), rows)
+                count += len(rows)
+        if count:
+            logger.info(f"Backfilled {count} saved items")
+
+
+def delete_orphans(engine):
+    """Remove saved rows whose event or opportunity no longer exists."""
+    with engine.begin() as conn:
+        count = 0
+        for kind, model in SAVED_KINDS.items():
+            count += conn.execute(
+                delete(saved_table).where(
+                    saved_table.c.kind == kind,
+                    ~select(model.id).where(model.id == saved_table.c.item_id).exists(),
+                )
+            ).rowcount
+        if count:
+            logger.info(f"Removed {count} saved items of deleted items")
@@ -0,0 +1,99 @@
+"""Idempotent schema setup.
+
+``create_all`` only creates missing tables, so indexes and search structures
+added to existing tables after the first deploy are created here instead.
+Every step is safe to run on each deploy.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from database import engine as default_engine
+import models
+import etags
+import json_lists
+import saved_items
+import search
+import summaries
+import tags
+
+logger = logging.getLogger(__name__)
+
+# Indexes earlier deploys created that no query uses any more; they only slow writes
+OBSOLETE_INDEXES = (
+    "ix_tech_events_tech_stack_gin",
+    "ix_tech_events_tags_gin",
+    "ix_research_opportunities_fields_gin",
+    "ix_research_opportunities_tags_gin",
+)
+
+
+def ensure_indexes(engine):
+    """Create any index declared on the models that the database doesn't have yet."""
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # Another worker may have created it concurrently
+                logger.warning(f"Could not create index {index.name}: {str(e)}")
+
+
+def drop_obsolete_indexes(engine):
+    """Drop the indexes in ``OBSOLETE_INDEXES`` where they still exist."""
+    for name in OBSOLETE_INDEXES:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        except Exception as e:
+            logger.warning(f"Could not drop index {name}: {str(e)}")
+
+
+def ensure_columns(engine):
+    """Add nullable columns declared on the models that existing tables don't have yet."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in models.Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable or column.primary_key:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                logger.info(f"Added column {table.name}.{column.name}")
+            except Exception as e:
+                # Another worker may have added it concurrently
+                logger.warning(f"Could not add column {table.name}.{column.name}: {str(e)}")
+
+
+def upgrade(engine):
+    """Bring existing tables up to date with the models."""
+    ensure_columns(engine)
+    # List columns first: the tag backfill reads them
+    json_lists.ensure_normalized(engine)
+    drop_obsolete_indexes(engine)
+    ensure_indexes(engine)
+    etags.ensure_rows(engine)
+    search.ensure_search_index(engine)
+    tags.ensure_backfilled(engine)
+    saved_items.ensure_backfilled(engine)
+    saved_items.delete_orphans(engine)
+    summaries.ensure_backfilled(engine)
+
+
+def ensure_schema(engine=default_engine):
+    """Create missing tables, then upgrade them."""
+    models.Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+
+
+if __name__ == "__main__":
+    # The deploy's single schema step (railway_start.sh)
+    import time
+    started = time.perf_counter()
+    ensure_schema()
+    print(f"Database schema is up to date ({time.perf_counter() - started:.2f}s)")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Generic, TypeVar
 from datetime import datetime
 from enum import Enum
 import json
@@ -141,6 +141,7 @@ class TechEventCreate(TechEventBase):
 
 class TechEvent(TechEventBase):
     id: int
+    summary: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     attendees: int = 0
@@ -149,6 +150,10 @@ class TechEvent(TechEventBase):
     class Config:
         from_attributes = True
 
+class TechEventListItem(TechEvent):
+    """An event as list endpoints return it: ``description`` only when requested with ``fields``."""
+    description: Optional[str] = None
+
 class ResearchOpportunityBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=500)  # More lenient length requirements
     organization: str = Field(..., min_length=1, max_length=200)  # More lenient
@@ -186,6 +191,7 @@ class ResearchOpportunityCreate(ResearchOpportunityBase):
 
 class ResearchOpportunity(ResearchOpportunityBase):
     id: int
+    summary: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     applications: int = 0
@@ -202,4 +208,34 @@ class ResearchOpportunity(ResearchOpportunityBase):
         return value or []
 
     class Config:
-        from_attributes = True  # or orm_mode = True for Pydantic v1
\ No newline at end of file
+        from_attributes = True  # or orm_mode = True for Pydantic v1
+
+class ResearchOpportunityListItem(ResearchOpportunity):
+    """An opportunity as list endpoints return it: ``description`` only when requested."""
+    description: Optional[str] = None
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """A bounded page of results. Pass ``next_cursor`` back as ``cursor`` to get the next page.
+
+    With ``total_capped``, ``total`` is a lower bound: there are more matches than it says.
+    """
+    items: List[T]
+    total: Optional[int] = None
+    total_capped: bool = False
+    limit: int
+    next_cursor: Optional[str] = None
+
+class ImportRowError(BaseModel):
+    line: int
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    """Outcome of a bulk import. Only the first ``IMPORT_MAX_ERRORS`` failed rows are listed."""
+    format: str
+    inserted: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+    aborted: Optional[str] = None
@@ -0,0 +1,230 @@
+"""Full-text search support for events and opportunities.
+
+SQLite gets an external-content FTS5 table per searchable model, kept in sync
+by triggers. PostgreSQL gets a generated ``search_vector`` tsvector column with
+a GIN index. Any other backend (or a SQLite build without FTS5) falls back to
+the old ``ILIKE`` matching so search keeps working everywhere.
+"""
+import contextlib
+import logging
+import re
+
+from sqlalchemy import cast, or_, select, text, literal_column, func
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.sql import column, table
+
+import models
+
+logger = logging.getLogger(__name__)
+
+# Columns indexed for every searchable table, in weight order (title ranks highest)
+SEARCH_COLUMNS = ("title", "organization", "description")
+
+SEARCHABLE_MODELS = (models.TechEvent, models.ResearchOpportunity)
+
+# engine -> tables whose native full-text index exists, read from the catalog
+_ready_tables = {}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts_table_name(table_name):
+    return f"{table_name}_fts"
+
+
+def _sqlite_insert_trigger(table_name):
+    fts = _fts_table_name(table_name)
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    return f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END"""
+
+
+def _sqlite_ddl(table_name):
+    fts = _fts_table_name(table_name)
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table_name}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )""",
+        _sqlite_insert_trigger(table_name),
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END""",
+        # Only re-index when a searchable column is written, not on every like/register
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table_name} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+    ]
+
+
+def _postgres_ddl(table_name):
+    weights = dict(zip(SEARCH_COLUMNS, "ABC"))
+    vector = " || ".join(
+        f"setweight(to_tsvector('english', coalesce({c}, '')), '{w}')"
+        for c, w in weights.items()
+    )
+    return [
+        f"""ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS ({vector}) STORED""",
+        f"""CREATE INDEX IF NOT EXISTS ix_{table_name}_search_vector
+            ON {table_name} USING GIN (search_vector)""",
+    ]
+
+
+def ensure_search_index(engine):
+    """Create the full-text index structures if they are missing.
+
+    Safe to call on every startup: all statements are idempotent, and the
+    SQLite index is only rebuilt from the base table when it is first created.
+    """
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        logger.info(f"Full-text search not supported on {dialect}, using LIKE fallback")
+        return
+
+    for model in SEARCHABLE_MODELS:
+        table_name = model.__tablename__
+        try:
+            with engine.begin() as conn:
+                if dialect == "sqlite":
+                    fts = _fts_table_name(table_name)
+                    exists = conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                        {"name": fts}
+                    ).first()
+                    for statement in _sqlite_ddl(table_name):
+                        conn.execute(text(statement))
+                    if not exists:
+                        logger.info(f"Building full-text index {fts}")
+                        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+                else:
+                    for statement in _postgres_ddl(table_name):
+                        conn.execute(text(statement))
+        except Exception as e:
+            logger.warning(f"Full-text index unavailable for {table_name}, using LIKE fallback: {str(e)}")
+    # Re-read on next use rather than trusting what this process just ran
+    _ready_tables.pop(engine, None)
+
+
+def _index_exists(conn, dialect, table_name):
+    if dialect == "sqlite":
+        statement = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name")
+        return conn.execute(statement, {"name": _fts_table_name(table_name)}).first() is not None
+    statement = text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table AND column_name = 'search_vector'"
+    )
+    return conn.execute(statement, {"table": table_name}).first() is not None
+
+
+def ready_tables(engine):
+    """Tables whose native full-text index exists, checked once per engine (read-only).
+
+    Every process reads this from the database catalog itself, so workers that
+    didn't run the schema step (``SCHEMA_ON_STARTUP=false``) still use it.
+    """
+    ready = _ready_tables.get(engine)
+    if ready is not None:
+        return ready
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        ready = frozenset()
+    else:
+        try:
+            with engine.connect() as conn:
+                ready = frozenset(
+                    model.__tablename__ for model in SEARCHABLE_MODELS
+                    if _index_exists(conn, dialect, model.__tablename__)
+                )
+        except Exception as e:
+            # Not cached: check again on the next search
+            logger.warning(f"Could not check the full-text indexes, using LIKE fallback: {str(e)}")
+            return frozenset()
+    missing = [model.__tablename__ for model in SEARCHABLE_MODELS if model.__tablename__ not in ready]
+    if missing:
+        logger.warning(f"Full-text index missing for {', '.join(missing)}, using LIKE fallback")
+    _ready_tables[engine] = ready
+    return ready
+
+
+@contextlib.contextmanager
+def bulk_load(conn, table_name):
+    """Defer SQLite full-text indexing of rows inserted into ``table_name`` inside the block.
+
+    Indexing row by row from the insert trigger costs about as much as the
+    insert itself. Inside the block the trigger is gone; on the way out the
+    new rows are indexed with one ``INSERT ... SELECT`` and the trigger is
+    recreated. All of it happens in ``conn``'s transaction, which holds the
+    write lock from the start, so no other connection inserts while the
+    trigger is missing and a failure rolls the trigger back too.
+    PostgreSQL's generated column needs no help, so this is a no-op there.
+    """
+    if conn.dialect.name != "sqlite" or table_name not in ready_tables(conn.engine):
+        yield
+        return
+    if not conn.connection.dbapi_connection.in_transaction:
+        # pysqlite only opens a transaction before DML, not before the DROP TRIGGER
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    fts = _fts_table_name(table_name)
+    last_id = conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {table_name}")).scalar()
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_ai"))
+    yield
+    cols = ", ".join(SEARCH_COLUMNS)
+    conn.execute(
+        text(f"INSERT INTO {fts}(rowid, {cols}) SELECT id, {cols} FROM {table_name} WHERE id > :last_id"),
+        {"last_id": last_id},
+    )
+    conn.execute(text(_sqlite_insert_trigger(table_name)))
+
+
+def _tokens(query):
+    return _TOKEN_RE.findall(query or "")
+
+
+def _like_filter(model, query):
+    return or_(*[getattr(model, c).ilike(f"%{query}%") for c in SEARCH_COLUMNS])
+
+
+def text_search(model, query, bind):
+    """Build the match filter and rank expression for a free-text query.
+
+    Returns ``(join_target, onclause, filter_clause, rank)``. ``join_target``
+    and ``onclause`` are ``None`` unless the caller has to join a ranking
+    subquery. ``rank`` sorts ascending (best match first) and is ``None`` when
+    the backend can't rank results.
+    """
+    table_name = model.__tablename__
+    tokens = _tokens(query)
+    dialect = bind.dialect.name
+
+    if not tokens or table_name not in ready_tables(bind):
+        return None, None, _like_filter(model, query), None
+
+    if dialect == "sqlite":
+        fts_name = _fts_table_name(table_name)
+        fts = table(fts_name, column("rowid"))
+        # Every token must match; the trailing * gives prefix matching for search-as-you-type
+        match = " ".join('"{}"*'.format(t.replace('"', '""')) for t in tokens)
+        matches = (
+            select(
+                fts.c.rowid.label("id"),
+                func.bm25(literal_column(fts_name)).label("rank"),
+            )
+            .select_from(fts)
+            .where(literal_column(fts_name).op("MATCH")(match))
+            .subquery(f"{table_name}_matches")
+        )
+        return matches, matches.c.id == model.id, None, matches.c.rank
+
+    # PostgreSQL: to_tsquery with prefix matching on every token
+    tsquery = func.to_tsquery("english", " & ".join(f"{t}:*" for t in tokens))
+    vector = literal_column(f"{table_name}.search_vector")
+    # ts_rank is float4; as float8 the value in a cursor compares equal to the stored rank again
+    rank = -cast(func.ts_rank(vector, tsquery), DOUBLE_PRECISION)
+    return None, None, vector.op("@@")(tsquery), rank
@@ -0,0 +1,471 @@
+"""Synthetic events, opportunities, users and saved items for load testing.
+
+Generates catalogues of any size (millions of rows) with realistic shapes:
+
+- tags, tech stacks and research fields follow a Zipf-like distribution, so
+  a few values are on most items and the long tail on a handful,
+- event dates spread over ``--past-days``/``--future-days`` with most of
+  them close to today, and end dates that fit the event type,
+- likes, attendees and applications are heavy-tailed,
+- every user saves a heavy-tailed number of items (``--saves-per-user`` on
+  average), biased towards popular ones.
+
+Rows are written in ``--batch-size`` batches, one transaction each. On
+PostgreSQL with psycopg2 they are streamed with ``COPY``, on SQLite with a
+plain executemany (each batch joins the full-text index in one statement,
+see :func:`search.bulk_load`), elsewhere with Core inserts. Ids are assigned here
+rather than returned, so the derived ``item_tags`` rows and ``summary``
+column are written along with the items. Rows are appended, so run it
+against an empty database for the same ids on every run of a ``--seed``.
+Every user gets the ``--password`` password (hashed once).
+
+Usage, with ``DATABASE_URL`` pointing at the target database::
+
+    python seed_data.py --events 1000000 --opportunities 200000 --users 100000
+"""
+import argparse
+import csv
+import io
+import itertools
+import operator
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+
+from database import engine as default_engine
+import etags
+import hashing
+import models
+import schema
+import search
+import summaries
+import tags as tag_index
+
+BATCH_SIZE = 10000
+
+# Descriptions and list values are drawn from pools so generating a row stays cheap
+DESCRIPTION_POOL_SIZE = 2000
+POOL_SIZE = 4096
+
+TAGS = (
+    "ai", "machine learning", "python", "web", "cloud", "security", "data science", "startups",
+    "open source", "javascript", "devops", "mobile", "blockchain", "design", "career", "robotics",
+    "iot", "quantum", "ar/vr", "gaming", "fintech", "healthtech", "climate", "education", "hardware",
+    "networking", "databases", "compilers", "privacy", "accessibility", "edtech", "biotech",
+)
+TECH_STACK = (
+    "Python", "JavaScript", "TypeScript", "React", "Node.js", "AWS", "Docker", "Kubernetes",
+    "PostgreSQL", "Go", "Rust", "Java", "PyTorch", "TensorFlow", "FastAPI", "Django", "Vue",
+    "GraphQL", "Terraform", "Swift", "Kotlin", "C++", "Spark", "Redis", "Unity", "Solidity",
+)
+FIELDS = (
+    "Machine Learning", "Artificial Intelligence", "Computer Vision", "Natural Language Processing",
+    "Systems", "Security", "Human-Computer Interaction", "Robotics", "Theory", "Databases",
+    "Networking", "Graphics", "Computational Biology", "Programming Languages", "Quantum Computing",
+    "Software Engineering", "Distributed Systems", "Data Science", "Ethics", "Education",
+)
+REQUIREMENTS = (
+    "Python", "Linear algebra", "Statistics", "C++", "Research experience", "Writing sample",
+    "GPA 3.5+", "Machine learning coursework", "Letter of recommendation", "US work authorization",
+)
+CITIES = (
+    "San Francisco, CA", "New York, NY", "Seattle, WA", "Austin, TX", "Boston, MA", "Pittsburgh, PA",
+    "Chicago, IL", "Los Angeles, CA", "Atlanta, GA", "Denver, CO", "Toronto, ON", "London, UK",
+    "Berlin, Germany", "Bangalore, India", "Singapore", "Remote",
+)
+WORDS = (
+    "build", "learn", "research", "scalable", "systems", "students", "engineers", "models", "data",
+    "open", "community", "hands-on", "talks", "projects", "industry", "mentors", "teams", "network",
+    "latest", "tools", "production", "experience", "applications", "cutting-edge", "workshop",
+    "collaborate", "innovation", "practical", "deep", "dive", "speakers", "papers", "lab", "funding",
+)
+
+# type -> (weight, duration range in hours)
+EVENT_TYPES = {
+    "Meetup": (30, (2, 4)),
+    "Tech Talk": (20, (1, 2)),
+    "Webinar": (20, (1, 2)),
+    "Workshop": (15, (3, 8)),
+    "Conference": (10, (24, 72)),
+    "Hackathon": (5, (24, 48)),
+}
+PRICES = (None, "Free", "Free", "$10", "$25", "$99", "$499")
+DURATIONS = ("10 weeks", "3 months", "6 months", "1 year", "2 years")
+COMPENSATION = ("Paid", "Paid", "Stipend", "Unpaid", None)
+OPPORTUNITY_TYPES = {"Research": 35, "Internship": 30, "Fellowship": 15, "Grant": 10, "Project": 10}
+
+# Share of saved items that are events (the rest are opportunities)
+SAVED_EVENT_SHARE = 0.7
+# Larger is more skewed towards the most popular items
+SAVE_POPULARITY_SKEW = 3
+
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative weights of rank 1..count under a Zipf-like distribution."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class Generator:
+    """Builds row dicts (Core column values, ids included) from one seeded RNG.
+
+    List values are drawn from pools built up front, each entry with its
+    ``item_tags`` rows, so a row costs a handful of RNG calls.
+    """
+
+    def __init__(self, seed, now=None):
+        self.rng = random.Random(seed)
+        self.random = self.rng.random
+        self.now = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        rng = self.rng
+
+        descriptions = (
+            " ".join(rng.choices(WORDS, k=rng.randint(30, 150))).capitalize() + "."
+            for _ in range(DESCRIPTION_POOL_SIZE)
+        )
+        self.descriptions = [(description, summaries.summarize(description)) for description in descriptions]
+        self.event_types = self._weighted(list(EVENT_TYPES), [weight for weight, _ in EVENT_TYPES.values()])
+        self.opportunity_types = self._weighted(list(OPPORTUNITY_TYPES), list(OPPORTUNITY_TYPES.values()))
+        self.cities = self._weighted(CITIES, zipf_weights(len(CITIES), exponent=0.8), cumulative=True)
+
+        self.event_tags = self._pool("event", "tags", TAGS, 1, 5)
+        self.event_tech = self._pool("event", "tech_stack", TECH_STACK, 0, 6)
+        self.opportunity_fields = self._pool("opportunity", "fields", FIELDS, 1, 4)
+        self.opportunity_tags = self._pool("opportunity", "tags", TAGS, 0, 3)
+        self.interests = self._pool("user", "interests", TAGS, 0, 4)
+        self.requirements = [rng.sample(REQUIREMENTS, rng.randint(1, 4)) for _ in range(POOL_SIZE)]
+        self.speakers = [
+            [f"Speaker {rng.randint(1, 20000)}" for _ in range(rng.randint(0, 4))] for _ in range(POOL_SIZE)
+        ]
+
+    def _weighted(self, values, weights, cumulative=False):
+        """``POOL_SIZE`` draws of ``values``, so a uniform pick follows ``weights``."""
+        key = "cum_weights" if cumulative else "weights"
+        return self.rng.choices(values, k=POOL_SIZE, **{key: weights})
+
+    def _pool(self, kind, facet, values, low, high):
+        """``(values, item_tags rows without item_id)`` entries, popular values more likely."""
+        weights = zipf_weights(len(values))
+        pool = []
+        for _ in range(POOL_SIZE):
+            picked = list(dict.fromkeys(self.rng.choices(values, cum_weights=weights, k=self.rng.randint(low, high))))
+            pool.append((picked, tag_index.tag_rows(kind, None, facet, picked)))
+        return pool
+
+    def _choice(self, pool):
+        return pool[int(self.random() * len(pool))]
+
+    def _heavy_tail(self, median, sigma=1.2):
+        return int(self.rng.lognormvariate(0, sigma) * median)
+
+    def _when(self, past_days, future_days):
+        """A time around now, denser close to today, on the half hour."""
+        offset = self.rng.triangular(-past_days, future_days, 0)
+        return self.now + timedelta(days=offset - offset % (1 / 48))
+
+    def event(self, item_id, past_days, future_days):
+        """``(tech_events row, item_tags rows)``."""
+        random = self.random
+        event_type = self._choice(self.event_types)
+        start = self._when(past_days, future_days)
+        created = min(start, self.now) - timedelta(days=7 + int(random() * 113))
+        description, summary = self._choice(self.descriptions)
+        tags, tag_rows = self._choice(self.event_tags)
+        tech_stack, tech_rows = self._choice(self.event_tech)
+        location = self._choice(self.cities)
+        low, high = EVENT_TYPES[event_type][1]
+        row = {
+            "id": item_id,
+            "title": f"{tags[0].title()} {event_type} #{item_id}",
+            "organization": f"Org {self._heavy_tail(50) % 5000}",
+            "description": description,
+            "summary": summary,
+            "venue": "Online" if location == "Remote" else f"Hall {1 + int(random() * 20)}",
+            "registration_link": f"https://example.com/events/{item_id}",
+            "start_date": start,
+            "end_date": start + timedelta(hours=low + int(random() * (high - low + 1))),
+            "location": location,
+            "type": event_type,
+            "price": self._choice(PRICES),
+            "tech_stack": tech_stack,
+            "speakers": self._choice(self.speakers),
+            "virtual": location == "Remote" or random() < 0.15,
+            "tags": tags,
+            "attendees": self._heavy_tail(40),
+            "likes": self._heavy_tail(5),
+            "created_at": created,
+            "updated_at": created,
+        }
+        return row, [{**tag_row, "item_id": item_id} for tag_row in tech_rows + tag_rows]
+
+    def opportunity(self, item_id, past_days, future_days):
+        """``(research_opportunities row, item_tags rows)``."""
+        random = self.random
+        opportunity_type = self._choice(self.opportunity_types)
+        deadline = self._when(past_days // 2, future_days)
+        created = min(deadline, self.now) - timedelta(days=14 + int(random() * 167))
+        description, summary = self._choice(self.descriptions)
+        fields, field_rows = self._choice(self.opportunity_fields)
+        tags, tag_rows = self._choice(self.opportunity_tags)
+        location = self._choice(self.cities)
+        row = {
+            "id": item_id,
+            "title": f"{fields[0]} {opportunity_type} #{item_id}",
+            "organization": f"Lab {self._heavy_tail(20) % 2000}",
+            "description": description,
+            "summary": summary,
+            "type": opportunity_type,
+            "location": location,
+            "deadline": deadline,
+            "duration": self._choice(DURATIONS),
+            "compensation": self._choice(COMPENSATION),
+            "requirements": self._choice(self.requirements),
+            "fields": fields,
+            "contact_email": f"contact{item_id}@example.com",
+            "website": f"https://example.com/opportunities/{item_id}" if random() < 0.6 else None,
+            "virtual": location == "Remote" or random() < 0.2,
+            "tags": tags,
+            "applications": self._heavy_tail(15),
+            "likes": self._heavy_tail(3),
+            "created_at": created,
+            "updated_at": created,
+        }
+        return row, [{**tag_row, "item_id": item_id} for tag_row in field_rows + tag_rows]
+
+    def user(self, user_id, hashed_password):
+        created = self.now - timedelta(days=int(self.random() * 730))
+        return {
+            "id": user_id,
+            "email": f"user{user_id}@example.com",
+            "username": f"user{user_id}",
+            "hashed_password": hashed_password,
+            "full_name": f"User {user_id}",
+            "is_active": True,
+            "interests": self._choice(self.interests)[0],
+            "saved_events": [],
+            "saved_opportunities": [],
+            "created_at": created,
+            "updated_at": created,
+        }
+
+    def saves(self, user_id, popular_events, popular_opportunities, mean):
+        """user_saved_items rows of one user, favouring items early in the popularity lists."""
+        rng = self.rng
+        count = int(rng.expovariate(1 / mean)) if mean else 0
+        picked = set()
+        for _ in range(count):
+            if popular_events and (rng.random() < SAVED_EVENT_SHARE or not popular_opportunities):
+                kind, popular = "event", popular_events
+            elif popular_opportunities:
+                kind, popular = "opportunity", popular_opportunities
+            else:
+                break
+            picked.add((kind, popular[int(len(popular) * rng.random() ** SAVE_POPULARITY_SKEW)]))
+        return [{"user_id": user_id, "kind": kind, "item_id": item_id} for kind, item_id in sorted(picked)]
+
+
+def _copy_value(value, column):
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(column.type, models.JsonList):
+        return models._dumps(value)
+    return value
+
+
+def _copy(conn, table, rows):
+    columns = [table.c[name] for name in rows[0]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column.name], column) for column in columns])
+    buffer.seek(0)
+    names = ", ".join(f'"{column.name}"' for column in columns)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({names}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    finally:
+        cursor.close()
+
+
+def _executemany(conn, table, rows):
+    # The column types' own bind processors (JSON text, SQLite datetime
+    # strings) without the per-row overhead of a Core executemany
+    names = list(rows[0])
+    processors = [
+        (position, process)
+        for position, process in enumerate(table.c[name].type.bind_processor(conn.dialect) for name in names)
+        if process
+    ]
+    values = operator.itemgetter(*names)
+    parameters = []
+    for row in rows:
+        row_values = list(values(row))
+        for position, process in processors:
+            row_values[position] = process(row_values[position])
+        parameters.append(tuple(row_values))
+    columns = ", ".join(f'"{name}"' for name in names)
+    placeholders = ", ".join("?" for _ in names)
+    conn.exec_driver_sql(f"INSERT INTO {table.name} ({columns}) VALUES ({placeholders})", parameters)
+
+
+def _writer(engine):
+    """``write(conn, table, rows)``: COPY on psycopg2, raw executemany on SQLite, else Core inserts."""
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        return _copy
+    if engine.dialect.name == "sqlite":
+        return _executemany
+    return lambda conn, table, rows: conn.execute(insert(table), rows)
+
+
+def _next_id(conn, table):
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _reset_sequences(conn, tables):
+    # Ids were written explicitly, so move the serial sequences past them
+    for table in tables:
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"(SELECT coalesce(max(id), 1) FROM {table.name}))"
+        ))
+
+
+def _seed_items(engine, write, table, make_row, count, batch_size, progress):
+    """Write ``count`` rows and their item_tags; returns ``(ids, item_tags rows written)``."""
+    with engine.connect() as conn:
+        first_id = _next_id(conn, table)
+    tagged = 0
+    for start in range(first_id, first_id + count, batch_size):
+        rows, tag_rows = [], []
+        for item_id in range(start, min(start + batch_size, first_id + count)):
+            row, item_tag_rows = make_row(item_id)
+            rows.append(row)
+            tag_rows.extend(item_tag_rows)
+        # Core writes skip the mapper events that maintain item_tags
+        with engine.begin() as conn:
+            with search.bulk_load(conn, table.name):
+                write(conn, table, rows)
+            if tag_rows:
+                write(conn, tag_index.item_tags, tag_rows)
+        tagged += len(tag_rows)
+        progress(table.name, start + len(rows) - first_id, count)
+    return list(range(first_id, first_id + count)), tagged
+
+
+def _popularity(generator, ids):
+    popular = list(ids)
+    generator.rng.shuffle(popular)
+    return popular
+
+
+def seed(
+    engine=default_engine,
+    events=0,
+    opportunities=0,
+    users=0,
+    saves_per_user=5.0,
+    password="password",
+    seed=1,
+    batch_size=BATCH_SIZE,
+    past_days=730,
+    future_days=365,
+    progress=lambda table, done, total: None,
+):
+    """Append synthetic rows; returns ``{table name: rows written}``.
+
+    Saved items point at the items seeded in the same call.
+    """
+    generator = Generator(seed)
+    write = _writer(engine)
+    written = {}
+
+    event_ids, event_tags = _seed_items(
+        engine, write, models.TechEvent.__table__,
+        lambda item_id: generator.event(item_id, past_days, future_days),
+        events, batch_size, progress,
+    )
+    opportunity_ids, opportunity_tags = _seed_items(
+        engine, write, models.ResearchOpportunity.__table__,
+        lambda item_id: generator.opportunity(item_id, past_days, future_days),
+        opportunities, batch_size, progress,
+    )
+    written[models.TechEvent.__tablename__] = len(event_ids)
+    written[models.ResearchOpportunity.__tablename__] = len(opportunity_ids)
+    written[tag_index.item_tags.name] = event_tags + opportunity_tags
+
+    users_table = models.User.__table__
+    saved_table = models.SavedItem.__table__
+    hashed_password = hashing.hash_password(password) if users else None
+    popular_events = _popularity(generator, event_ids)
+    popular_opportunities = _popularity(generator, opportunity_ids)
+    with engine.connect() as conn:
+        first_id = _next_id(conn, users_table)
+    saved = 0
+    for start in range(first_id, first_id + users, batch_size):
+        user_ids = range(start, min(start + batch_size, first_id + users))
+        rows = [generator.user(user_id, hashed_password) for user_id in user_ids]
+        saved_rows = [
+            save
+            for user_id in user_ids
+            for save in generator.saves(user_id, popular_events, popular_opportunities, saves_per_user)
+        ]
+        with engine.begin() as conn:
+            write(conn, users_table, rows)
+            if saved_rows:
+                write(conn, saved_table, saved_rows)
+        saved += len(saved_rows)
+        progress(users_table.name, start + len(rows) - first_id, users)
+    written[users_table.name] = users
+    written[saved_table.name] = saved
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            _reset_sequences(conn, (models.TechEvent.__table__, models.ResearchOpportunity.__table__, users_table))
+        etags.bump(conn, set(written))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic events, opportunities and users.")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--opportunities", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--saves-per-user", type=float, default=5.0, help="average saved items per user")
+    parser.add_argument("--password", default="password", help="password of every seeded user")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--past-days", type=int, default=730, help="how far back dates go")
+    parser.add_argument("--future-days", type=int, default=365, help="how far ahead dates go")
+    args = parser.parse_args()
+
+    schema.ensure_schema(default_engine)
+    started = time.perf_counter()
+
+    def progress(table, done, total):
+        print(f"\r{table}: {done:,}/{total:,} ({time.perf_counter() - started:.1f}s)", end="", flush=True)
+        if done == total:
+            print()
+
+    written = seed(
+        events=args.events,
+        opportunities=args.opportunities,
+        users=args.users,
+        saves_per_user=args.saves_per_user,
+        password=args.password,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        past_days=args.past_days,
+        future_days=args.future_days,
+        progress=progress,
+    )
+    elapsed = time.perf_counter() - started
+    total = sum(written.values())
+    print(", ".join(f"{count:,} {table}" for table, count in written.items()))
+    print(f"Seeded {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
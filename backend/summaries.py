@@ -0,0 +1,79 @@
+"""Stored ``summary`` snippets for events and opportunities.
+
+List endpoints send ``summary`` instead of the full ``description`` Text
+column. The summary is derived from the description on every ORM insert or
+update that touches it (mapper events), so readers never compute it.
+Core inserts (bulk import) call :func:`summarize` themselves.
+"""
+import logging
+import os
+
+from sqlalchemy import event, inspect, select, update, bindparam
+
+import models
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_LENGTH = int(os.getenv("SUMMARY_LENGTH", "280"))
+BACKFILL_BATCH_SIZE = 1000
+
+SUMMARIZED_MODELS = (models.TechEvent, models.ResearchOpportunity)
+
+
+def summarize(description, length=SUMMARY_LENGTH):
+    """First ``length`` characters of ``description``, whitespace collapsed, cut at a word."""
+    if not description:
+        return description
+    text = " ".join(description.split())
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def _before_insert(mapper, connection, target):
+    target.summary = summarize(target.description)
+
+
+def _before_update(mapper, connection, target):
+    if inspect(target).attrs.description.history.has_changes():
+        target.summary = summarize(target.description)
+
+
+for _model in SUMMARIZED_MODELS:
+    event.listen(_model, "before_insert", _before_insert)
+    event.listen(_model, "before_update", _before_update)
+
+
+def ensure_backfilled(engine):
+    """Fill ``summary`` for rows written before the column existed."""
+    for model in SUMMARIZED_MODELS:
+        table = model.__table__
+        missing = (table.c.summary.is_(None), table.c.description.isnot(None))
+        with engine.begin() as conn:
+            if conn.execute(select(table.c.id).where(*missing).limit(1)).first() is None:
+                continue
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("_id"))
+                # Keep updated_at: deriving a summary is not an edit
+                .values(summary=bindparam("_summary"), updated_at=table.c.updated_at)
+            )
+            # Filled rows drop out of ``missing``, so each pass reads the next batch
+            batch_query = (
+                select(table.c.id, table.c.description)
+                .where(*missing)
+                .order_by(table.c.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            )
+            count = 0
+            while True:
+                batch = conn.execute(batch_query).all()
+                if not batch:
+                    break
+                rows = [{"_id": row_id, "_summary": summarize(description)} for row_id, description in batch]
+                conn.execute(stmt, rows)
+                count += len(rows)
+            logger.info(f"Backfilled summaries for {count} {table.name} rows")
@@ -0,0 +1,132 @@
+"""Exact tag filtering backed by the ``item_tags`` table.
+
+The list columns on events and opportunities stay the source of truth; mapper
+events mirror them into ``item_tags`` inside the same flush, so filters can do
+indexed equality lookups instead of substring scans over JSON text (which
+made "Java" match "JavaScript").
+"""
+import logging
+
+from sqlalchemy import select, insert, delete, func, event, inspect
+
+import models
+
+logger = logging.getLogger(__name__)
+
+# Tagged models: kind stored in item_tags and the list columns mirrored into it
+TAGGED_MODELS = {
+    models.TechEvent: ("event", ("tech_stack", "tags")),
+    models.ResearchOpportunity: ("opportunity", ("fields", "tags")),
+}
+
+BACKFILL_BATCH_SIZE = 1000
+
+item_tags = models.ItemTag.__table__
+
+
+def normalize(value):
+    return value.strip().casefold()
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else []
+
+
+def tag_rows(kind, item_id, facet, values):
+    """item_tags rows for one facet of one item, deduplicated after normalizing."""
+    normalized = {normalize(v) for v in _as_list(values) if isinstance(v, str) and v.strip()}
+    return [
+        {"kind": kind, "facet": facet, "value": v, "item_id": item_id}
+        for v in sorted(normalized)
+    ]
+
+
+def rows_for(model, item):
+    """item_tags rows for every facet of ``item`` (an instance or a row mapping)."""
+    kind, facets = TAGGED_MODELS[model]
+    get = item.get if isinstance(item, dict) else lambda name: getattr(item, name)
+    rows = []
+    for facet in facets:
+        rows.extend(tag_rows(kind, get("id"), facet, get(facet)))
+    return rows
+
+
+def write_rows(connection, rows):
+    if rows:
+        connection.execute(insert(item_tags), rows)
+
+
+def tag_filter(model, facet, values):
+    """Filter for items that carry *all* of ``values`` in ``facet``."""
+    kind, facets = TAGGED_MODELS[model]
+    if facet not in facets:
+        raise ValueError(f"{model.__name__} has no tag facet {facet!r}")
+    wanted = {normalize(v) for v in values if v and v.strip()}
+    if not wanted:
+        return None
+    matching = (
+        select(item_tags.c.item_id)
+        .where(
+            item_tags.c.kind == kind,
+            item_tags.c.facet == facet,
+            item_tags.c.value.in_(wanted),
+        )
+        .group_by(item_tags.c.item_id)
+        .having(func.count() == len(wanted))
+    )
+    return model.id.in_(matching)
+
+
+def _after_insert(mapper, connection, target):
+    write_rows(connection, rows_for(mapper.class_, target))
+
+
+def _after_update(mapper, connection, target):
+    kind, facets = TAGGED_MODELS[mapper.class_]
+    state = inspect(target)
+    changed = [f for f in facets if state.attrs[f].history.has_changes()]
+    if not changed:
+        return
+    connection.execute(
+        delete(item_tags).where(
+            item_tags.c.kind == kind,
+            item_tags.c.item_id == target.id,
+            item_tags.c.facet.in_(changed),
+        )
+    )
+    rows = []
+    for facet in changed:
+        rows.extend(tag_rows(kind, target.id, facet, getattr(target, facet)))
+    write_rows(connection, rows)
+
+
+def _after_delete(mapper, connection, target):
+    kind, _ = TAGGED_MODELS[mapper.class_]
+    connection.execute(
+        delete(item_tags).where(item_tags.c.kind == kind, item_tags.c.item_id == target.id)
+    )
+
+
+for _model in TAGGED_MODELS:
+    event.listen(_model, "after_insert", _after_insert)
+    event.listen(_model, "after_update", _after_update)
+    event.listen(_model, "after_delete", _after_delete)
+
+
+def ensure_backfilled(engine):
+    """Populate item_tags from the list columns if it has never been filled."""
+    with engine.begin() as conn:
+        if conn.execute(select(item_tags.c.item_id).limit(1)).first() is not None:
+            return
+        for model, (kind, facets) in TAGGED_MODELS.items():
+            columns = [model.__table__.c.id] + [model.__table__.c[f] for f in facets]
+            result = conn.execution_options(yield_per=BACKFILL_BATCH_SIZE).execute(select(*columns))
+            count = 0
+            for batch in result.partitions():
+                rows = []
+                for row in batch:
+                    rows.extend(rows_for(model, row._asdict()))
+                write_rows(conn, rows)
+                count += len(batch)
+            if count:
+                logger.info(f"Backfilled tags for {count} {kind} rows")
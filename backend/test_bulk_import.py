@@ -0,0 +1,105 @@
+"""Bulk NDJSON / CSV import: valid rows land, invalid ones are reported by line."""
+import json
+
+import bulk_import
+import models
+from database import engine
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def event_row(word, **values):
+    return {
+        "title": f"{word} imported",
+        "organization": "Import org",
+        "description": f"Imported {word} event.",
+        "venue": "Hall",
+        "registration_link": "https://example.com",
+        "start_date": "2030-05-01T10:00:00",
+        "end_date": "2030-05-01T12:00:00",
+        "location": "Remote",
+        "type": "Meetup",
+        "tags": [word],
+        **values,
+    }
+
+
+def post(client, admin_headers, body, url="/events/import", headers=NDJSON):
+    response = client.post(url, content=body.encode(), headers={**admin_headers, **headers})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def imported_titles(client, word):
+    items = client.get(f"/events/search/?tags={word}&fields=title&limit=100").json()["items"]
+    return sorted(item["title"] for item in items)
+
+
+def test_ndjson_reports_bad_lines_and_keeps_good_ones(client, admin_headers, unique_word):
+    lines = [
+        json.dumps(event_row(unique_word)),
+        "{not json",
+        "",
+        json.dumps(["an", "array"]),
+        json.dumps(event_row(unique_word, title=f"{unique_word} second", type="Party")),
+        json.dumps(event_row(unique_word, title=f"{unique_word} third", speakers=["Ada"])),
+        json.dumps({k: v for k, v in event_row(unique_word).items() if k != "venue"}),
+    ]
+
+    report = post(client, admin_headers, "\n".join(lines) + "\n")
+
+    assert (report["format"], report["inserted"], report["failed"]) == ("ndjson", 2, 4)
+    assert not report["errors_truncated"] and report["aborted"] is None
+    errors = {error["line"]: error["errors"] for error in report["errors"]}
+    assert sorted(errors) == [2, 4, 5, 7]
+    assert errors[2][0].startswith("Invalid JSON")
+    assert errors[4] == ["Expected a JSON object"]
+    assert errors[5][0].startswith("type:")
+    assert errors[7] == ["venue: Field required"]
+    assert imported_titles(client, unique_word) == [f"{unique_word} imported", f"{unique_word} third"]
+
+
+def test_error_list_is_truncated(client, admin_headers, unique_word, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_MAX_ERRORS", 2)
+
+    report = post(client, admin_headers, "x\n" * 5 + json.dumps(event_row(unique_word)))
+
+    assert (report["inserted"], report["failed"]) == (1, 5)
+    assert [error["line"] for error in report["errors"]] == [1, 2]
+    assert report["errors_truncated"]
+
+
+def test_rows_split_across_chunks_and_batches(client, unique_word):
+    rows = [event_row(unique_word, title=f"{unique_word} café {i}") for i in range(5)]
+    body = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+    # Small chunks cut lines, and the two-byte "é", in the middle
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+
+    report = bulk_import.import_rows(engine, models.TechEvent, "ndjson", chunks, batch_size=2)
+
+    assert (report["inserted"], report["failed"]) == (5, 0)
+    assert imported_titles(client, unique_word) == sorted(row["title"] for row in rows)
+
+
+def test_csv_list_cells(client, admin_headers, unique_word):
+    row = event_row(unique_word)
+    header = [name for name in row if name != "tags"] + ["tags", "tech_stack"]
+    values = [row[name] for name in header[:-2]] + [unique_word, "Python; Go"]
+    body = ",".join(header) + "\n" + ",".join(values) + "\n" + ",".join(values + ["extra"]) + "\n"
+
+    report = post(client, admin_headers, body, headers={"Content-Type": "text/csv"})
+
+    assert (report["format"], report["inserted"], report["failed"]) == ("csv", 1, 1)
+    assert report["errors"] == [{"line": 3, "errors": ["More values than header columns"]}]
+    page = client.get(f"/events/search/?tags={unique_word}&tech_stack=go&fields=tech_stack").json()
+    assert page["items"] == [{"tech_stack": ["Python", "Go"]}]
+
+
+def test_needs_an_admin(client):
+    response = client.post("/events/import", content=b"{}", headers=NDJSON)
+    assert response.status_code == 401
+
+
+def test_unknown_content_type(client, admin_headers):
+    response = client.post("/events/import", content=b"{}", headers={**admin_headers, "Content-Type": "text/plain"})
+    assert response.status_code == 415
@@ -0,0 +1,133 @@
+"""The write-behind counter buffer behind like / register / apply."""
+import threading
+
+import pytest
+from sqlalchemy import event
+
+import counters
+import etags
+import models
+from database import engine
+
+
+@pytest.fixture
+def buffer():
+    # Flushed by hand: the interval and threshold never trigger on their own
+    counter_buffer = counters.CounterBuffer(engine, flush_interval=3600, flush_threshold=10 ** 6)
+    yield counter_buffer
+    counter_buffer.stop()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements run on the sync engine while the test runs."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def stored_likes(db, item):
+    db.expire_all()
+    return db.get(type(item), item.id).likes
+
+
+def test_only_the_first_click_reads_the_row(buffer, make_event, statements):
+    item_id = make_event(likes=5).id
+    statements.clear()
+
+    values = [buffer.increment(models.TechEvent, "likes", item_id) for _ in range(3)]
+
+    assert values == [6, 7, 8]
+    assert len(statements) == 1
+
+
+def test_missing_row(buffer):
+    assert buffer.increment(models.TechEvent, "likes", 10 ** 9) is None
+
+
+def test_flush_writes_the_aggregated_delta(buffer, db, make_event):
+    item = make_event(likes=5)
+    for _ in range(4):
+        buffer.increment(models.TechEvent, "likes", item.id)
+    assert stored_likes(db, item) == 5
+
+    buffer.flush()
+
+    assert stored_likes(db, item) == 9
+    assert buffer.pending(models.TechEvent, "likes", item.id) == 0
+    assert buffer.increment(models.TechEvent, "likes", item.id) == 10
+
+
+def test_concurrent_clicks_get_distinct_values(buffer, db, make_event):
+    item = make_event()
+    values = []
+
+    def click():
+        for i in range(50):
+            values.append(buffer.increment(models.TechEvent, "likes", item.id))
+            if i % 10 == 0:
+                buffer.flush()
+
+    threads = [threading.Thread(target=click) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    buffer.flush()
+
+    assert sorted(values) == list(range(1, 201))
+    assert stored_likes(db, item) == 200
+
+
+def test_failed_flush_requeues_the_deltas(buffer, db, make_event, monkeypatch):
+    item = make_event(likes=1)
+    buffer.increment(models.TechEvent, "likes", item.id)
+    buffer.increment(models.TechEvent, "likes", item.id)
+
+    def fail(conn, table_names):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(etags, "bump", fail)
+    buffer.flush()
+    assert stored_likes(db, item) == 1
+    assert buffer.pending(models.TechEvent, "likes", item.id) == 2
+    assert buffer.increment(models.TechEvent, "likes", item.id) == 4
+
+    monkeypatch.undo()
+    buffer.flush()
+    assert stored_likes(db, item) == 4
+    assert buffer.pending(models.TechEvent, "likes", item.id) == 0
+
+
+def test_flush_forgets_deleted_rows(buffer, db, make_event):
+    item = make_event()
+    buffer.increment(models.TechEvent, "likes", item.id)
+    db.delete(item)
+    db.commit()
+
+    buffer.flush()
+
+    assert buffer.increment(models.TechEvent, "likes", item.id) is None
+
+
+def test_flush_notifies_with_the_flushed_tables(buffer, make_event, make_opportunity):
+    flushed = []
+    buffer.on_flush.append(flushed.append)
+    buffer.increment(models.TechEvent, "likes", make_event().id)
+    buffer.increment(models.ResearchOpportunity, "applications", make_opportunity().id)
+
+    buffer.flush()
+
+    assert flushed == [{"tech_events", "research_opportunities"}]
+
+
+def test_like_endpoint(client, make_event):
+    item = make_event(likes=3)
+    assert client.post(f"/events/{item.id}/like").json()["likes"] == 4
+    assert client.post(f"/events/{item.id}/register").json()["attendees"] == 1
+    assert client.post("/events/999999999/like").status_code == 404
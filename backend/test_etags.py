@@ -0,0 +1,58 @@
+"""Conditional GETs on the catalogue endpoints."""
+import pytest
+
+import counters
+
+CATALOGUE_URLS = [
+    "/events/",
+    "/events/search/",
+    "/opportunities/",
+    "/opportunities/search/",
+]
+
+
+@pytest.mark.parametrize("url", CATALOGUE_URLS)
+def test_matching_etag_gets_304(client, url):
+    first = client.get(url)
+    etag = first.headers["etag"]
+
+    again = client.get(url, headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_weak_comparison_and_lists(client):
+    etag = client.get("/events/").headers["etag"]
+    bare = etag.removeprefix("W/")
+
+    assert client.get("/events/", headers={"If-None-Match": bare}).status_code == 304
+    assert client.get("/events/", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert client.get("/events/", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/events/", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_write_changes_the_etag(client, make_event):
+    etag = client.get("/events/").headers["etag"]
+
+    make_event()
+
+    response = client.get("/events/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_counter_flush_changes_the_etag(client, make_event):
+    item = make_event()
+    etag = client.get("/events/").headers["etag"]
+    opportunities_etag = client.get("/opportunities/").headers["etag"]
+
+    assert client.post(f"/events/{item.id}/like").status_code == 200
+    counters.buffer.flush()
+
+    response = client.get("/events/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    # Only the flushed table's version moves
+    assert client.get("/opportunities/", headers={"If-None-Match": opportunities_etag}).status_code == 304
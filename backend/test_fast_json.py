@@ -0,0 +1,64 @@
+"""fast_json responses match the ORM + response_model path they replace."""
+import pytest
+
+import fast_json
+
+LIST_URLS = [
+    "/events/?limit=50",
+    "/events/?limit=50&fields=title,tech_stack,start_date",
+    "/events/?limit=50&fields=description",
+    "/events/search/?query={word}",
+    "/events/search/?query={word}&fields=id,tags&limit=1",
+    "/opportunities/?limit=50",
+    "/opportunities/?limit=50&fields=requirements,deadline",
+    "/opportunities/search/?query={word}",
+    "/opportunities/search/?query={word}&response_fields=title,fields&limit=1",
+]
+
+
+@pytest.fixture
+def catalogue(make_event, make_opportunity, unique_word):
+    # Values the schema validators normalize: empty list entries and JSON-encoded lists
+    make_event(title=f"{unique_word} summit", tech_stack=["Python", "", "  "], tags=["web"], speakers=[])
+    make_event(title=f"{unique_word} meetup", description="Long text " * 50, summary="Long text")
+    make_opportunity(title=f"{unique_word} fellowship", requirements=["", "CV"], fields='["AI"]')
+    make_opportunity(title=f"{unique_word} grant", contact_email="grants@example.com")
+    return unique_word
+
+
+def fetch(client, url, enabled, monkeypatch):
+    monkeypatch.setattr(fast_json, "ENABLED", enabled)
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json(), response.headers.get("x-next-cursor")
+
+
+@pytest.mark.parametrize("url", LIST_URLS)
+def test_same_output_as_the_orm_path(client, catalogue, monkeypatch, url):
+    url = url.format(word=catalogue)
+    fast = fetch(client, url, True, monkeypatch)
+    orm = fetch(client, url, False, monkeypatch)
+    assert fast == orm
+
+
+def test_validators_still_apply(client, catalogue, monkeypatch):
+    events, _ = fetch(client, f"/events/search/?query={catalogue}&fields=title,tech_stack", True, monkeypatch)
+    by_title = {item["title"]: item for item in events["items"]}
+    assert by_title[f"{catalogue} summit"] == {"title": f"{catalogue} summit", "tech_stack": ["Python"]}
+
+    opportunities, _ = fetch(client, f"/opportunities/search/?query={catalogue}", True, monkeypatch)
+    by_title = {item["title"]: item for item in opportunities["items"]}
+    assert by_title[f"{catalogue} fellowship"]["requirements"] == ["CV"]
+    assert by_title[f"{catalogue} fellowship"]["fields"] == ["AI"]
+
+
+def test_lists_leave_description_out(client, catalogue, monkeypatch):
+    for enabled in (True, False):
+        page, _ = fetch(client, f"/events/search/?query={catalogue}", enabled, monkeypatch)
+        assert all("description" not in item and "summary" in item for item in page["items"])
+
+
+def test_unknown_field(client):
+    response = client.get("/events/?fields=title,password")
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
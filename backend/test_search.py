@@ -0,0 +1,106 @@
+"""Search pages: bounded, rank-ordered, and stable across cursors."""
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects import postgresql
+
+import models
+import pagination
+import search
+from database import engine
+
+
+def walk(client, url):
+    """Follow ``next_cursor`` from ``url``; returns the pages' envelopes."""
+    pages = [client.get(url).json()]
+    while pages[-1]["next_cursor"]:
+        pages.append(client.get(f"{url}&cursor={pages[-1]['next_cursor']}").json())
+    return pages
+
+
+def test_tied_ranks_page_without_duplicates_or_gaps(client, make_event, unique_word):
+    # Identical text gives every match the same rank: only the id breaks the tie
+    ids = {make_event(title=f"{unique_word} meetup", description="Same text").id for _ in range(23)}
+
+    pages = walk(client, f"/events/search/?query={unique_word}&limit=5")
+
+    seen = [item["id"] for page in pages for item in page["items"]]
+    assert len(seen) == len(set(seen))
+    assert set(seen) == ids
+    assert [page["total"] for page in pages] == [23] * len(pages)
+
+
+def test_best_match_comes_first(client, make_opportunity, unique_word):
+    weak = make_opportunity(title="Opportunity", description=f"Mentions {unique_word} once")
+    strong = make_opportunity(title=f"{unique_word} {unique_word}", description=f"All about {unique_word}")
+
+    items = client.get(f"/opportunities/search/?query={unique_word}").json()["items"]
+
+    assert [item["id"] for item in items] == [strong.id, weak.id]
+
+
+def test_total_is_capped(client, make_event, unique_word, monkeypatch):
+    monkeypatch.setattr(pagination, "PAGE_TOTAL_CAP", 10)
+    for _ in range(12):
+        make_event(title=unique_word)
+
+    first = client.get(f"/events/search/?query={unique_word}&limit=5").json()
+    assert (first["total"], first["total_capped"]) == (10, True)
+    second = client.get(f"/events/search/?query={unique_word}&limit=5&cursor={first['next_cursor']}").json()
+    assert (second["total"], second["total_capped"]) == (10, True)
+
+    small = client.get(f"/events/search/?query={unique_word}&limit=20").json()
+    assert (small["total"], small["total_capped"]) == (10, True)
+
+
+def test_total_without_a_count_query_when_everything_fits(client, make_event, unique_word):
+    make_event(title=unique_word)
+    page = client.get(f"/events/search/?query={unique_word}").json()
+    assert (page["total"], page["total_capped"], page["next_cursor"]) == (1, False, None)
+
+
+def test_postgres_rank_is_compared_as_float8():
+    # ts_rank returns float4; the cursor carries a float8, so both sides must be float8
+    class Bind:
+        dialect = postgresql.dialect()
+
+    bind = Bind()
+    search._ready_tables[bind] = frozenset({models.TechEvent.__tablename__})
+    try:
+        _, _, match, rank = search.text_search(models.TechEvent, "python", bind)
+    finally:
+        search._ready_tables.pop(bind)
+    keys = [(rank, False), (models.TechEvent.id, False)]
+    cursor = pagination.encode_cursor([-0.0607927, 7])
+    stmt, _ = pagination.page_query(select(models.TechEvent.id).where(match), keys, cursor)
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.count("AS DOUBLE PRECISION)") == 4  # seek (twice), select list and ORDER BY
+    assert "ts_rank" not in sql.replace("CAST(ts_rank", "")
+
+
+def _insert_trigger_exists(db):
+    return db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'tech_events_fts_ai'")
+    ).first() is not None
+
+
+def test_bulk_load_indexes_the_batch(client, db, unique_word):
+    table = models.TechEvent.__table__
+    with engine.begin() as conn:
+        with search.bulk_load(conn, table.name):
+            conn.execute(insert(table), [{"title": f"{unique_word} {i}", "type": "Meetup"} for i in range(3)])
+
+    assert _insert_trigger_exists(db)
+    assert client.get(f"/events/search/?query={unique_word}&fields=title").json()["total"] == 3
+
+
+def test_bulk_load_failure_keeps_the_trigger(client, db, unique_word):
+    table = models.TechEvent.__table__
+    with pytest.raises(RuntimeError):
+        with engine.begin() as conn:
+            with search.bulk_load(conn, table.name):
+                conn.execute(insert(table), [{"title": unique_word, "type": "Meetup"}])
+                raise RuntimeError("seeding crashed")
+
+    assert _insert_trigger_exists(db)
+    assert client.get(f"/events/search/?query={unique_word}&fields=title").json()["total"] == 0
@@ -0,0 +1,84 @@
+"""Tag filters: exact, case-insensitive, every value required, backed by item_tags."""
+import pytest
+from sqlalchemy import select
+
+import models
+import tags
+
+
+def search_ids(client, path, **params):
+    query = "&".join(f"{name}={value}" for name, values in params.items() for value in values)
+    # /opportunities/search/ takes the sparse fieldset as response_fields (fields is a tag facet there)
+    fieldset = "response_fields" if path.startswith("/opportunities") else "fields"
+    response = client.get(f"{path}?{query}&{fieldset}=id&limit=100")
+    assert response.status_code == 200, response.text
+    return {item["id"] for item in response.json()["items"]}
+
+
+def stored_tags(db, kind, item_id):
+    rows = db.execute(
+        select(tags.item_tags.c.facet, tags.item_tags.c.value)
+        .where(tags.item_tags.c.kind == kind, tags.item_tags.c.item_id == item_id)
+    ).all()
+    return {tuple(row) for row in rows}
+
+
+def test_match_is_exact(client, make_event, unique_word):
+    java = make_event(tech_stack=[f"{unique_word}java"]).id
+    make_event(tech_stack=[f"{unique_word}javascript"])
+
+    assert search_ids(client, "/events/search/", tech_stack=[f"{unique_word}java"]) == {java}
+    assert search_ids(client, "/events/search/", tech_stack=[f"{unique_word}jav"]) == set()
+
+
+def test_match_ignores_case_and_whitespace(client, make_event, unique_word):
+    item = make_event(tags=[f"  {unique_word.upper()}Cloud "]).id
+
+    assert search_ids(client, "/events/search/", tags=[f"{unique_word}cloud"]) == {item}
+    assert search_ids(client, "/events/search/", tags=[f"{unique_word}CLOUD"]) == {item}
+
+
+def test_every_value_must_match(client, make_opportunity, unique_word):
+    ai, ml = f"{unique_word}ai", f"{unique_word}ml"
+    both = make_opportunity(fields=[ai, ml]).id
+    only_ai = make_opportunity(fields=[ai]).id
+
+    assert search_ids(client, "/opportunities/search/", fields=[ai]) == {both, only_ai}
+    assert search_ids(client, "/opportunities/search/", fields=[ai, ml]) == {both}
+    # Repeating a value doesn't make it count twice
+    assert search_ids(client, "/opportunities/search/", fields=[ai, ai.upper()]) == {both, only_ai}
+
+
+def test_facets_are_separate(client, make_event, unique_word):
+    make_event(tags=[f"{unique_word}rust"])
+
+    assert search_ids(client, "/events/search/", tech_stack=[f"{unique_word}rust"]) == set()
+
+
+def test_update_replaces_the_changed_facet(db, make_event, unique_word):
+    item = make_event(tech_stack=["Python", "Go"], tags=[unique_word])
+
+    item.tech_stack = ["Rust", "rust ", "python"]
+    db.commit()
+
+    assert stored_tags(db, "event", item.id) == {
+        ("tech_stack", "rust"), ("tech_stack", "python"), ("tags", unique_word),
+    }
+
+
+def test_delete_removes_the_rows(db, make_event, make_opportunity, unique_word):
+    item = make_event(tags=[unique_word])
+    # Same id space in another kind: its rows must survive
+    opportunity = make_opportunity(tags=[unique_word])
+    item_id = item.id
+
+    db.delete(item)
+    db.commit()
+
+    assert stored_tags(db, "event", item_id) == set()
+    assert stored_tags(db, "opportunity", opportunity.id) == {("tags", unique_word)}
+
+
+def test_unknown_facet():
+    with pytest.raises(ValueError, match="speakers"):
+        tags.tag_filter(models.TechEvent, "speakers", ["Ada"])
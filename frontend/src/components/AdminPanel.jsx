@@ -93,10 +93,19 @@ const AdminPanel = () => {
         }
     };
 
-    const handleEdit = (item) => {
+    const handleEdit = async (item) => {
         setIsEditing(true);
         setCurrentItem(item);
         setFormData(item);
+        // List responses omit the full description; load the complete item for the form
+        try {
+            const response = activeTab === 'opportunities'
+                ? await opportunityService.getOpportunity(item.id)
+                : await eventService.getEvent(item.id);
+            setFormData(response.data);
+        } catch (error) {
+            console.error('Error loading item:', error);
+        }
     };
 
     const handleDelete = async (id) => {
@@ -61,7 +61,7 @@ const EventsList = () => {
     const filteredEvents = events.filter(event => {
         // Handle property access safely to prevent errors if properties don't exist
         const eventTitle = event.title || event.name || "";
-        const eventDescription = event.description || "";
+        const eventDescription = event.summary || event.description || "";
         const eventType = event.type || event.event_type || "";
         const techStack = event.tech_stack || [];
         
@@ -343,7 +343,7 @@ const EventsList = () => {
                                                 ))}
                                             </div>
                                             
-                                            <p className="event-description">{event.description || "No description available."}</p>
+                                            <p className="event-description">{event.summary || event.description || "No description available."}</p>
                                             
                                             <div className="event-footer">
                                                 <motion.a 
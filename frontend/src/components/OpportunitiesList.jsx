@@ -107,7 +107,7 @@ const OpportunitiesList = () => {
     const filteredOpportunities = opportunities.filter(opportunity => {
         const matchesSearch = opportunity.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
             opportunity.organization.toLowerCase().includes(searchTerm.toLowerCase()) ||
-            opportunity.description.toLowerCase().includes(searchTerm.toLowerCase());
+            (opportunity.summary || opportunity.description || '').toLowerCase().includes(searchTerm.toLowerCase());
 
         const matchesType = selectedFilters.type.length === 0 ||
             selectedFilters.type.includes(opportunity.type);
@@ -295,7 +295,7 @@ const OpportunitiesList = () => {
                                 </div>
                             )}
 
-                            <p className="description">{opportunity.description}</p>
+                            <p className="description">{opportunity.summary || opportunity.description}</p>
 
                             <div className="contact">
                                 <FiGlobe className="icon" />
@@ -172,6 +172,10 @@ export const eventService = {
     return api.get('/events/');
   },
   
+  getEvent: async (eventId) => {
+    return api.get(`/events/${eventId}`);
+  },
+  
   createEvent: async (eventData) => {
     try {
       console.log('Creating event with data:', JSON.stringify(eventData));
@@ -243,6 +247,10 @@ export const opportunityService = {
     return api.get('/opportunities/');
   },
   
+  getOpportunity: async (opportunityId) => {
+    return api.get(`/opportunities/${opportunityId}`);
+  },
+  
   createOpportunity: async (opportunityData) => {
     try {
       console.log('Creating opportunity with data:', JSON.stringify(opportunityData));